@@ -1,37 +1,170 @@
-import time
-
-
-def bspline_basis(t):
-    B0 = ((1 - t) ** 3) / 6.0
-    B1 = (3 * t ** 3 - 6 * t ** 2 + 4) / 6.0
-    B2 = (-3 * t ** 3 + 3 * t ** 2 + 3 * t + 1) / 6.0
-    B3 = (t ** 3) / 6.0
-    return B0, B1, B2, B3
-
-def draw_bspline_curve(canvas, control_points, debug=False):
-    dt = 0.01
-    n = len(control_points)
-    for i in range(n - 3):
-        t = 0.0
-        while t <= 1.0:
-            B0, B1, B2, B3 = bspline_basis(t)
-            x = (B0 * control_points[i][0] +
-                 B1 * control_points[i + 1][0] +
-                 B2 * control_points[i + 2][0] +
-                 B3 * control_points[i + 3][0])
-            y = (B0 * control_points[i][1] +
-                 B1 * control_points[i + 1][1] +
-                 B2 * control_points[i + 2][1] +
-                 B3 * control_points[i + 3][1])
-            plot_pixel(canvas, int(round(x)), int(round(y)), debug)
-            t += dt
-
-
-def plot_pixel(canvas, x, y, debug):
-    canvas.create_rectangle(x, y, x + 1, y + 1, fill="black", outline="black")
-    if debug:
-        canvas.update()
-        time.sleep(0.01)
+import math
+
+import numpy as np
+
+import Module.bresenham as bresenham
+import Module.clip as clip
+import Module.curve as curve
+import Module.framebuffer as framebuffer
+import Module.stepper as stepper
+
+# Матрицы перехода от значений многочлена степени p в точках k / p к опорным точкам Безье
+_interpolation = {}
+
+
+def bspline_points(control_points, tolerance=curve.FLATNESS, viewport=None):
+    return curve.bspline_points(control_points, tolerance, viewport)
+
+def draw_bspline_curves(canvas, control_polygons):
+    geometry = [curve.bspline_geometry(points) for points in control_polygons]
+    curve.draw_curves(canvas, "bspline", np.concatenate(geometry) if geometry else [])
+
+def uniform_knots(count, degree):
+    return list(range(count + degree + 1))
+
+def clamped_knots(count, degree):
+    inner = count - degree
+    return [0] * degree + list(range(inner + 1)) + [inner] * degree
+
+def find_span(t, degree, knots, count):
+    if t >= knots[count]:
+        span = count - 1
+        while knots[span] == knots[span + 1]:
+            span -= 1
+        return span
+    low, high = degree, count
+    while high - low > 1:
+        mid = (low + high) // 2
+        if t < knots[mid]:
+            high = mid
+        else:
+            low = mid
+    return low
+
+def de_boor(t, degree, knots, control_points, span=None):
+    if span is None:
+        span = find_span(t, degree, knots, len(control_points))
+    d = [list(control_points[j + span - degree]) for j in range(degree + 1)]
+    for r in range(1, degree + 1):
+        for j in range(degree, r - 1, -1):
+            i = j + span - degree
+            alpha = (t - knots[i]) / (knots[i + degree + 1 - r] - knots[i])
+            d[j][0] = (1 - alpha) * d[j - 1][0] + alpha * d[j][0]
+            d[j][1] = (1 - alpha) * d[j - 1][1] + alpha * d[j][1]
+    return d[degree][0], d[degree][1]
+
+def _de_boor_array(ts, span, degree, knots, control_points):
+    d = np.repeat(control_points[None, span - degree:span + 1], len(ts), axis=0)
+    for r in range(1, degree + 1):
+        for j in range(degree, r - 1, -1):
+            i = j + span - degree
+            alpha = ((ts - knots[i]) / (knots[i + degree + 1 - r] - knots[i]))[:, None]
+            d[:, j] = (1 - alpha) * d[:, j - 1] + alpha * d[:, j]
+    return d[:, degree]
 
 
+def _bezier_matrix(degree):
+    matrix = _interpolation.get(degree)
+    if matrix is None:
+        u = np.arange(degree + 1) / degree
+        i = np.arange(degree + 1)
+        binomial = np.array([math.comb(degree, k) for k in i], dtype=np.float64)
+        bernstein = binomial * u[:, None] ** i * (1 - u[:, None]) ** (degree - i)
+        matrix = np.linalg.inv(bernstein)
+        _interpolation[degree] = matrix
+    return matrix
+
+
+class BSplineCurve:
+    # Сплайн произвольной степени. Пиксели хранятся по отдельности для каждого
+    # ненулевого промежутка узлов, поэтому перемещение одной опорной точки
+    # пересчитывает только degree + 2 промежутка, которые от неё зависят.
+    # С viewport хранятся только видимые пиксели
+    def __init__(self, control_points, degree=3, knots="uniform", viewport=None):
+        count = len(control_points)
+        if count <= degree:
+            raise ValueError(f"Для B-сплайна степени {degree} нужно минимум {degree + 1} опорные точки")
+        if knots == "uniform":
+            knots = uniform_knots(count, degree)
+        elif knots == "clamped":
+            knots = clamped_knots(count, degree)
+        elif len(knots) != count + degree + 1:
+            raise ValueError(f"Нужно {count + degree + 1} узлов, задано {len(knots)}")
+        self.degree = degree
+        self.viewport = viewport
+        self.knots = [float(k) for k in knots]
+        self.control_points = np.array(control_points, dtype=np.float64).reshape(-1, 2)
+        self.span_count = count - degree
+        self.first_span = next(j for j in range(self.span_count)
+                               if self.knots[j + degree] < self.knots[j + degree + 1])
+        self.joints = [None] * (self.span_count + 1)
+        self.span_pixels = [[] for _ in range(self.span_count)]
+        self._update(0, self.span_count - 1)
+
+    def _joint(self, j):
+        return de_boor(self.knots[j + self.degree], self.degree, self.knots, self.control_points)
+
+    def _rasterize_span(self, j):
+        p = self.degree
+        t0, t1 = self.knots[j + p], self.knots[j + p + 1]
+        if t0 == t1:
+            return []
+        polygon = self.control_points[j:j + p + 1]
+        if self.viewport is not None:
+            # Промежуток лежит в выпуклой оболочке своих p + 1 опорных точек
+            (xmin, ymin), (xmax, ymax) = polygon.min(axis=0), polygon.max(axis=0)
+            if not clip.box_visible(xmin - 1, ymin - 1, xmax + 1, ymax + 1, self.viewport):
+                return []
+        # Промежуток - многочлен степени p: его форма Безье берётся по p + 1 значениям,
+        # а ломаная строится адаптивным делением с допуском curve.FLATNESS
+        ts = t0 + (t1 - t0) * np.arange(p + 1) / p
+        control = _bezier_matrix(p) @ _de_boor_array(ts, j + p, p, self.knots, self.control_points)
+        control = [self.joints[j]] + [tuple(P) for P in control[1:-1].tolist()] + [self.joints[j + 1]]
+        vertices = curve.flatten_bezier(*control, viewport=self.viewport)
+        pixels = list(bresenham.polyline_points(vertices, self.viewport))
+        # Первый пиксель совпадает с последним пикселем предыдущего промежутка
+        joint = (int(round(vertices[0][0])), int(round(vertices[0][1])))
+        if j != self.first_span and pixels and pixels[0] == joint:
+            return pixels[1:]
+        return pixels
+
+    def _update(self, lo, hi):
+        lo = max(lo, 0)
+        hi = min(hi, self.span_count - 1)
+        for j in range(lo, hi + 2):
+            self.joints[j] = self._joint(j)
+        old = []
+        new = []
+        for j in range(lo, hi + 1):
+            old.extend(self.span_pixels[j])
+            self.span_pixels[j] = self._rasterize_span(j)
+            new.extend(self.span_pixels[j])
+        return old, new
+
+    def move_point(self, index, point):
+        self.control_points[index] = point
+        return self._update(index - self.degree - 1, index)
+
+    def nearest_point(self, x, y, radius=8):
+        distances = np.hypot(self.control_points[:, 0] - x, self.control_points[:, 1] - y)
+        index = int(np.argmin(distances))
+        return index if distances[index] <= radius else None
+
+    def points(self):
+        for pixels in self.span_pixels:
+            yield from pixels
+
+
+def draw_bspline_curve(canvas, control_points, debug=False, degree=3, knots="uniform"):
+    spline = BSplineCurve(control_points, degree, knots)
+    if debug:
+        stepper.animate(canvas, spline.points())
+    else:
+        framebuffer.get_framebuffer(canvas).plot_points(list(spline.points()))
+    return spline
 
+def move_bspline_point(canvas, spline, index, point):
+    old, new = spline.move_point(index, point)
+    fb = framebuffer.get_framebuffer(canvas)
+    fb.plot_points(old, fb.background)
+    fb.plot_points(new)
@@ -1,20 +1,46 @@
-import time
+import numpy as np
 
-def draw_line(canvas, x0, y0, x1, y1, debug=False):
+import Module.clip as clip
+import Module.framebuffer as framebuffer
+import Module.raster as raster
+import Module.stepper as stepper
+
+
+def _minor_steps(k, d_major, d_minor):
+    # Число шагов по ведомой оси за первые k итераций цикла с err = dx - dy
+    return (2 * d_minor * k + d_major - 1) // (2 * d_major) if d_major else 0
+
+
+def line_points(x0, y0, x1, y1, viewport=None, trace=None):
+    if trace is not None:
+        trace.begin(("x", "y", "err", "e2"))
     dx = abs(x1 - x0)
     dy = abs(y1 - y0)
     sx = 1 if x0 < x1 else -1
     sy = 1 if y0 < y1 else -1
     err = dx - dy
+    count = max(dx, dy) + 1
 
-    while True:
-        canvas.create_rectangle(x0, y0, x0 + 1, y0 + 1, fill="black", outline="black")
-        if debug:
-            canvas.update()
-            time.sleep(0.05)
+    if viewport is not None:
+        steps = clip.step_range(x0, y0, x1, y1, count - 1, viewport)
+        if steps is None:
+            return
+        k0, k1 = steps
+        # Начинаем сразу с шага k0: координаты и err восстанавливаются по замкнутой форме
+        if dx >= dy:
+            x_steps, y_steps = k0, _minor_steps(k0, dx, dy)
+        else:
+            x_steps, y_steps = _minor_steps(k0, dy, dx), k0
+        x0 += sx * x_steps
+        y0 += sy * y_steps
+        err += y_steps * dx - x_steps * dy
+        count = k1 - k0 + 1
 
-        if x0 == x1 and y0 == y1:
-            break
+    for _ in range(count):
+        if trace is not None:
+            trace.append(x0, y0, err, 2 * err)
+        if viewport is None or clip.inside(x0, y0, viewport):
+            yield x0, y0
 
         e2 = 2 * err
 
@@ -27,4 +53,160 @@ def draw_line(canvas, x0, y0, x1, y1, debug=False):
             y0 += sy
 
 
+def polyline_points(vertices, viewport=None):
+    # Вершины округляются до пикселей, соседние отрезки делят общую вершину,
+    # поэтому она выдаётся один раз (отрезок Брезенхэма не возвращается в свой первый пиксель)
+    if viewport is not None:
+        yield from _clipped_polyline_points(vertices, viewport)
+        return
+    prev = None
+    for vx, vy in vertices:
+        v = (int(round(vx)), int(round(vy)))
+        if prev is None:
+            if viewport is None or clip.inside(v[0], v[1], viewport):
+                yield v
+        elif v != prev:
+            for p in line_points(prev[0], prev[1], v[0], v[1], viewport):
+                if p != prev:
+                    yield p
+        prev = v
+
+
+def _clipped_polyline_points(vertices, viewport):
+    # Пиксели отрезка Брезенхэма лежат в габаритах его концов, поэтому отрезки,
+    # чьи габариты не задевают окно, отбрасываются сразу, одной проверкой на массиве
+    v = np.rint(np.asarray(list(vertices), dtype=np.float64).reshape(-1, 2)).astype(np.int64)
+    if len(v) == 0:
+        return
+    if clip.inside(int(v[0, 0]), int(v[0, 1]), viewport):
+        yield int(v[0, 0]), int(v[0, 1])
+    lo = np.minimum(v[:-1], v[1:])
+    hi = np.maximum(v[:-1], v[1:])
+    visible = np.nonzero(clip.box_visible_mask(lo[:, 0], lo[:, 1], hi[:, 0], hi[:, 1], viewport))[0]
+    v = v.tolist()
+    for i in visible.tolist():
+        prev = (v[i][0], v[i][1])
+        for p in line_points(prev[0], prev[1], v[i + 1][0], v[i + 1][1], viewport):
+            if p != prev:
+                yield p
+
+
+def polyline_points_batch(vertices, offsets, viewport=None):
+    # Пакет ломаных за один вызов: вершины всех ломаных подряд, offsets - их границы.
+    # Пиксели группируются по ломаным; каждый стык выдаётся один раз, как в polyline_points
+    segments, owners, first, _ = raster.polyline_links(np.rint(vertices), offsets)
+    points, seg_offsets = line_points_batch(segments, viewport)
+    # Звено начинается в конце предыдущего; после отсечения этой точки может не быть,
+    # поэтому ищем её по совпадению с началом звена
+    seg = np.repeat(np.arange(len(segments)), np.diff(seg_offsets))
+    joint = (points == segments[seg, :2]).all(axis=1) & ~first[seg]
+    counts = np.bincount(owners[seg[~joint]], minlength=len(offsets) - 1)
+    offsets = np.zeros(len(counts) + 1, dtype=np.int64)
+    np.cumsum(counts, out=offsets[1:])
+    return points[~joint], offsets
+
+
+def line_spans(x0, y0, x1, y1, viewport=None):
+    dx = abs(x1 - x0)
+    dy = abs(y1 - y0)
+    sx = 1 if x0 < x1 else -1
+    sy = 1 if y0 < y1 else -1
 
+    if dx >= dy:
+        major, minor = dx, dy
+        a0, b0, sa, sb, axis = x0, y0, sx, sy, "x"
+    else:
+        major, minor = dy, dx
+        a0, b0, sa, sb, axis = y0, x0, sy, sx, "y"
+
+    m_first, m_last = 0, minor
+    if viewport is not None:
+        steps = clip.step_range(x0, y0, x1, y1, major, viewport)
+        if steps is None:
+            return
+        m_first = _minor_steps(steps[0], major, minor)
+        m_last = _minor_steps(steps[1], major, minor)
+
+    # Цикл line_points делает m-й шаг по ведомой оси на итерации
+    # k_m = ceil((2 * major * m - major + 1) / (2 * minor)), поэтому целая серия
+    # пикселей считается одним целочисленным делением
+    two_major = 2 * major
+    two_minor = 2 * minor
+    end = 0 if m_first == 0 else -((major - 1 - two_major * m_first) // two_minor)
+    for m in range(m_first, m_last + 1):
+        start = end
+        end = major + 1 if m == minor else -((major - 1 - two_major * (m + 1)) // two_minor)
+        length = end - start
+        a = a0 + sa * start if sa > 0 else a0 - end + 1
+        b = b0 + sb * m
+        if axis == "x":
+            span = (a, b, length, axis)
+        else:
+            span = (b, a, length, axis)
+        if viewport is not None:
+            span = clip.clip_span(span, viewport)
+            if span is None:
+                continue
+        yield span
+
+
+def line_points_batch(segments, viewport=None):
+    segments = np.asarray(segments, dtype=np.int64).reshape(-1, 4)
+    x0, y0, x1, y1 = segments.T
+    dx = np.abs(x1 - x0)
+    dy = np.abs(y1 - y0)
+    sx = np.where(x0 < x1, 1, -1)
+    sy = np.where(y0 < y1, 1, -1)
+
+    steps = np.maximum(dx, dy)
+    first = np.zeros(len(segments), dtype=np.int64)
+    counts = steps + 1
+    if viewport is not None:
+        first, last = clip.step_range_batch(segments, steps, viewport)
+        counts = last - first + 1
+    offsets = np.zeros(len(segments) + 1, dtype=np.int64)
+    np.cumsum(counts, out=offsets[1:])
+    seg = np.repeat(np.arange(len(segments)), counts)
+    k = np.arange(offsets[-1]) - offsets[seg] + first[seg]
+
+    # Замкнутая форма цикла с err = dx - dy: по ведущей оси шаг на каждой итерации,
+    # по ведомой число шагов после k итераций равно (2 * d_minor * k + d_major - 1) // (2 * d_major)
+    x_major = dx >= dy
+    d_major = np.maximum(np.where(x_major, dx, dy), 1)[seg]
+    d_minor = np.where(x_major, dy, dx)[seg]
+    minor = (2 * d_minor * k + d_major - 1) // (2 * d_major)
+    x_major = x_major[seg]
+
+    points = np.empty((offsets[-1], 2), dtype=np.int64)
+    points[:, 0] = x0[seg] + sx[seg] * np.where(x_major, k, minor)
+    points[:, 1] = y0[seg] + sy[seg] * np.where(x_major, minor, k)
+    if viewport is not None:
+        # Диапазон шагов берётся с запасом, лишние пиксели на краях отбрасываем
+        return clip.filter_batch(points, offsets, viewport)
+    return points, offsets
+
+
+def draw_lines(canvas, segments):
+    fb = framebuffer.get_framebuffer(canvas)
+    points, _ = line_points_batch(segments, fb.viewport())
+    fb.plot_points(points)
+
+
+def draw_polyline(canvas, vertices, debug=False):
+    # Вся ломаная - одна запись в кадровый буфер
+    fb = framebuffer.get_framebuffer(canvas)
+    if debug:
+        stepper.animate(canvas, polyline_points(vertices, fb.viewport()))
+        return
+    points, _ = polyline_points_batch(vertices, [0, len(vertices)], fb.viewport())
+    fb.plot_points(points)
+
+
+def draw_line(canvas, x0, y0, x1, y1, debug=False):
+    fb = framebuffer.get_framebuffer(canvas)
+    viewport = fb.viewport()
+    if debug:
+        stepper.animate(canvas, line_points(x0, y0, x1, y1, viewport))
+        return
+    for x, y, length, axis in line_spans(x0, y0, x1, y1, viewport):
+        fb.plot_span(x, y, length, axis)
@@ -1,20 +1,37 @@
-import time
+import numpy as np
 
+import Module.clip as clip
+import Module.framebuffer as framebuffer
+import Module.stepper as stepper
+
+
+def circle_points(cx, cy, radius, viewport=None, trace=None):
+    if viewport is not None:
+        if not clip.box_visible(cx - radius, cy - radius, cx + radius, cy + radius, viewport):
+            return
+        for x, y in circle_points(cx, cy, radius, trace=trace):
+            if clip.inside(x, y, viewport):
+                yield x, y
+        return
 
-def draw_circle(canvas, cx, cy, radius, debug=False):
     x = 0
     y = radius
     d = 1 - radius
+    if trace is not None:
+        trace.begin(("x", "y", "d"))
 
     while x <= y:
-        plot_pixel(canvas, cx + x, cy + y, debug)
-        plot_pixel(canvas, cx + y, cy + x, debug)
-        plot_pixel(canvas, cx - x, cy + y, debug)
-        plot_pixel(canvas, cx - y, cy + x, debug)
-        plot_pixel(canvas, cx - x, cy - y, debug)
-        plot_pixel(canvas, cx - y, cy - x, debug)
-        plot_pixel(canvas, cx + x, cy - y, debug)
-        plot_pixel(canvas, cx + y, cy - x, debug)
+        if trace is not None:
+            trace.append(cx + x, cy + y, d, cx + y, cy + x, d, cx - x, cy + y, d, cx - y, cy + x, d,
+                         cx - x, cy - y, d, cx - y, cy - x, d, cx + x, cy - y, d, cx + y, cy - x, d)
+        yield cx + x, cy + y
+        yield cx + y, cy + x
+        yield cx - x, cy + y
+        yield cx - y, cy + x
+        yield cx - x, cy - y
+        yield cx - y, cy - x
+        yield cx + x, cy - y
+        yield cx + y, cy - x
 
         if d < 0:
             d += 2 * x + 3
@@ -24,11 +41,72 @@ def draw_circle(canvas, cx, cy, radius, debug=False):
         x += 1
 
 
-def plot_pixel(canvas, x, y, debug):
-    canvas.create_rectangle(x, y, x + 1, y + 1, fill="black", outline="black")
-    if debug:
-        canvas.update()
-        time.sleep(0.01)
+OCTANTS = np.array([(1, 1, False), (1, 1, True), (-1, 1, False), (-1, 1, True),
+                    (-1, -1, False), (-1, -1, True), (1, -1, False), (1, -1, True)])
+# Какие из восьми симметричных точек оставить, когда они совпадают: x == 0, x == y и обе сразу
+KEEP_X0 = np.array([1, 1, 0, 1, 1, 0, 0, 0], dtype=bool)
+KEEP_XY = np.array([1, 0, 1, 0, 1, 0, 1, 0], dtype=bool)
+KEEP_00 = np.array([1, 0, 0, 0, 0, 0, 0, 0], dtype=bool)
+
+
+def circle_points_batch(centers, radii, viewport=None):
+    centers = np.asarray(centers, dtype=np.int64).reshape(-1, 2)
+    radii = np.broadcast_to(np.asarray(radii, dtype=np.int64), (len(centers),))
+    if viewport is not None:
+        # Окружности вне окна отбрасываются по габариту до растеризации
+        visible = clip.box_visible_mask(centers[:, 0] - radii, centers[:, 1] - radii,
+                                        centers[:, 0] + radii, centers[:, 1] + radii, viewport)
+        points, offsets = circle_points_batch(centers[visible], radii[visible])
+        return clip.filter_batch(points, offsets, viewport, visible)
+
+    # На шаге x цикл circle_points стоит в строке y = max{y : y^2 - y < r^2 - x^2},
+    # то есть y = (isqrt(4 * (r^2 - x^2)) + 1) // 2; шаги идут, пока x <= y
+    bound = (radii * 0.7072).astype(np.int64) + 2
+    circle_idx = np.repeat(np.arange(len(centers)), bound)
+    x = np.arange(int(bound.sum())) - np.repeat(np.cumsum(bound) - bound, bound)
+    r = radii[circle_idx]
+    k4 = 4 * (r * r - x * x)
+    s = np.floor(np.sqrt(np.maximum(k4, 0))).astype(np.int64)
+    s += (s + 1) * (s + 1) <= k4
+    s -= s * s > k4
+    s[k4 < 0] = -1
+    y = (s + 1) // 2
+    steps = x <= y
+    circle_idx, x, y = circle_idx[steps], x[steps], y[steps]
+
+    keep = np.ones((len(x), 8), dtype=bool)
+    keep &= (x != 0)[:, None] | KEEP_X0
+    keep &= (x != y)[:, None] | KEEP_XY
+    keep &= ((x != 0) | (y != 0))[:, None] | KEEP_00
 
+    sx, sy, swap = OCTANTS[:, 0], OCTANTS[:, 1], OCTANTS[:, 2].astype(bool)
+    px = np.where(swap, y[:, None], x[:, None]) * sx
+    py = np.where(swap, x[:, None], y[:, None]) * sy
+    owner = np.broadcast_to(circle_idx[:, None], keep.shape)[keep]
+
+    points = np.empty((int(keep.sum()), 2), dtype=np.int64)
+    points[:, 0] = px[keep] + centers[owner, 0]
+    points[:, 1] = py[keep] + centers[owner, 1]
+    offsets = np.zeros(len(centers) + 1, dtype=np.int64)
+    np.cumsum(np.bincount(owner, minlength=len(centers)), out=offsets[1:])
+    return points, offsets
+
+
+def draw_circles(canvas, centers, radii):
+    fb = framebuffer.get_framebuffer(canvas)
+    points, _ = circle_points_batch(centers, radii, fb.viewport())
+    fb.plot_points(points)
+
+
+def draw_circle(canvas, cx, cy, radius, debug=False):
+    viewport = framebuffer.get_framebuffer(canvas).viewport()
+    points = circle_points(cx, cy, radius, viewport)
+    if debug:
+        stepper.animate(canvas, points)
+        return
+    for x, y in points:
+        plot_pixel(canvas, x, y)
 
 
+def plot_pixel(canvas, x, y):
+    framebuffer.get_framebuffer(canvas).plot(x, y)
@@ -0,0 +1,115 @@
+import math
+
+import numpy as np
+
+
+def mirrored_range(center, lo, hi):
+    # Смещения t >= 0, при которых center + t или center - t попадает в [lo, hi)
+    ranges = [(max(lo - center, 0), hi - 1 - center),
+              (max(center - hi + 1, 0), center - lo)]
+    ranges = [(start, end) for start, end in ranges if start <= end]
+    if not ranges:
+        return None
+    return min(r[0] for r in ranges), max(r[1] for r in ranges)
+
+
+def inside(x, y, viewport):
+    return viewport[0] <= x < viewport[2] and viewport[1] <= y < viewport[3]
+
+
+def box_visible(xmin, ymin, xmax, ymax, viewport):
+    return xmax >= viewport[0] and xmin < viewport[2] and ymax >= viewport[1] and ymin < viewport[3]
+
+
+def box_visible_mask(xmin, ymin, xmax, ymax, viewport):
+    return (xmax >= viewport[0]) & (xmin < viewport[2]) & (ymax >= viewport[1]) & (ymin < viewport[3])
+
+
+def liang_barsky(x0, y0, x1, y1, box):
+    # Параметры t0 <= t1 видимой части отрезка P(t) = P0 + t (P1 - P0) в замкнутом прямоугольнике
+    t0, t1 = 0.0, 1.0
+    dx = x1 - x0
+    dy = y1 - y0
+    for p, q in ((-dx, x0 - box[0]), (dx, box[2] - x0), (-dy, y0 - box[1]), (dy, box[3] - y0)):
+        if p == 0:
+            if q < 0:
+                return None
+        elif p < 0:
+            t0 = max(t0, q / p)
+        else:
+            t1 = min(t1, q / p)
+        if t0 > t1:
+            return None
+    return t0, t1
+
+
+def liang_barsky_batch(segments, box):
+    x0, y0, x1, y1 = (segments[:, i].astype(float) for i in range(4))
+    dx = x1 - x0
+    dy = y1 - y0
+    t0 = np.zeros(len(segments))
+    t1 = np.ones(len(segments))
+    visible = np.ones(len(segments), dtype=bool)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        for p, q in ((-dx, x0 - box[0]), (dx, box[2] - x0), (-dy, y0 - box[1]), (dy, box[3] - y0)):
+            visible &= (p != 0) | (q >= 0)
+            r = q / p
+            t0 = np.where(p < 0, np.maximum(t0, r), t0)
+            t1 = np.where(p > 0, np.minimum(t1, r), t1)
+    visible &= t0 <= t1
+    return t0, t1, visible
+
+
+def _pixel_box(viewport):
+    # Пиксель отрезка отстоит от идеальной прямой меньше чем на пиксель,
+    # поэтому отсекаем по окну, расширенному на 1 с каждой стороны
+    return viewport[0] - 1, viewport[1] - 1, viewport[2], viewport[3]
+
+
+def step_range(x0, y0, x1, y1, steps, viewport):
+    # Номера шагов растеризации 0..steps, на которых отрезок может быть виден
+    t = liang_barsky(x0, y0, x1, y1, _pixel_box(viewport))
+    if t is None:
+        return None
+    return max(int(math.floor(t[0] * steps)), 0), min(int(math.ceil(t[1] * steps)), steps)
+
+
+def step_range_batch(segments, steps, viewport):
+    t0, t1, visible = liang_barsky_batch(segments, _pixel_box(viewport))
+    k0 = np.maximum(np.floor(np.where(visible, t0, 0) * steps), 0).astype(np.int64)
+    k1 = np.minimum(np.ceil(np.where(visible, t1, 0) * steps), steps).astype(np.int64)
+    k1 = np.where(visible, k1, k0 - 1)
+    return k0, k1
+
+
+def inside_mask(points, viewport):
+    return ((points[:, 0] >= viewport[0]) & (points[:, 0] < viewport[2]) &
+            (points[:, 1] >= viewport[1]) & (points[:, 1] < viewport[3]))
+
+
+def clip_span(span, viewport):
+    x, y, length, axis = span
+    if axis == "x":
+        if not viewport[1] <= y < viewport[3]:
+            return None
+        start, end = max(x, viewport[0]), min(x + length, viewport[2])
+        return (start, y, end - start, axis) if start < end else None
+    if not viewport[0] <= x < viewport[2]:
+        return None
+    start, end = max(y, viewport[1]), min(y + length, viewport[3])
+    return (x, start, end - start, axis) if start < end else None
+
+
+def filter_batch(points, offsets, viewport, selected=None):
+    # Оставляет видимые точки пакета и пересчитывает границы фигур;
+    # selected - маска фигур исходного пакета, для которых считались точки
+    owner = np.repeat(np.arange(len(offsets) - 1), np.diff(offsets))
+    keep = inside_mask(points, viewport)
+    counts = np.bincount(owner[keep], minlength=len(offsets) - 1)
+    if selected is not None:
+        all_counts = np.zeros(len(selected), dtype=np.int64)
+        all_counts[selected] = counts
+        counts = all_counts
+    offsets = np.zeros(len(counts) + 1, dtype=np.int64)
+    np.cumsum(counts, out=offsets[1:])
+    return points[keep], offsets
@@ -0,0 +1,179 @@
+import numpy as np
+
+import Module.bresenham as bresenham
+import Module.clip as clip
+import Module.framebuffer as framebuffer
+
+FLATNESS = 0.5
+MAX_DEPTH = 16
+
+# Базисные матрицы: строка степени [t^3, t^2, t, 1], столбец элемента геометрии
+BASES = {
+    "hermite": np.array([[2, -2, 1, 1],
+                         [-3, 3, -2, -1],
+                         [0, 0, 1, 0],
+                         [1, 0, 0, 0]], dtype=np.float64),
+    "bezier": np.array([[-1, 3, -3, 1],
+                        [3, -6, 3, 0],
+                        [-3, 3, 0, 0],
+                        [1, 0, 0, 0]], dtype=np.float64),
+    "bspline": np.array([[-1, 3, -3, 1],
+                         [3, -6, 3, 0],
+                         [-3, 0, 3, 0],
+                         [1, 4, 1, 0]], dtype=np.float64) / 6.0,
+}
+TO_BEZIER = {name: np.linalg.solve(BASES["bezier"], m) for name, m in BASES.items()}
+
+_tables = {}
+
+
+def bspline_to_bezier(Q0, Q1, Q2, Q3):
+    return (((Q0[0] + 4 * Q1[0] + Q2[0]) / 6.0, (Q0[1] + 4 * Q1[1] + Q2[1]) / 6.0),
+            ((2 * Q1[0] + Q2[0]) / 3.0, (2 * Q1[1] + Q2[1]) / 3.0),
+            ((Q1[0] + 2 * Q2[0]) / 3.0, (Q1[1] + 2 * Q2[1]) / 3.0),
+            ((Q1[0] + 4 * Q2[0] + Q3[0]) / 6.0, (Q1[1] + 4 * Q2[1] + Q3[1]) / 6.0))
+
+
+def _is_flat(control, tolerance):
+    P0, Pn = control[0], control[-1]
+    if len(control) == 4:
+        # Оценка отклонения кубической кривой от хорды P0-P3 по контрольным точкам
+        P1, P2 = control[1], control[2]
+        ux = 3 * P1[0] - 2 * P0[0] - Pn[0]
+        uy = 3 * P1[1] - 2 * P0[1] - Pn[1]
+        vx = 3 * P2[0] - P0[0] - 2 * Pn[0]
+        vy = 3 * P2[1] - P0[1] - 2 * Pn[1]
+        return max(ux * ux, vx * vx) + max(uy * uy, vy * vy) <= 16 * tolerance * tolerance
+    # Кривая другой степени лежит в оболочке контрольных точек: достаточно,
+    # чтобы все они были не дальше tolerance от хорды
+    cx, cy = Pn[0] - P0[0], Pn[1] - P0[1]
+    chord = cx * cx + cy * cy
+    for P in control[1:-1]:
+        px, py = P[0] - P0[0], P[1] - P0[1]
+        t = min(max((px * cx + py * cy) / chord, 0.0), 1.0) if chord else 0.0
+        if (px - t * cx) ** 2 + (py - t * cy) ** 2 > tolerance * tolerance:
+            return False
+    return True
+
+
+def _split(control):
+    # Деление кривой Безье пополам по де Кастельжо
+    left, right = [control[0]], [control[-1]]
+    while len(control) > 1:
+        control = [((P[0] + Q[0]) / 2, (P[1] + Q[1]) / 2) for P, Q in zip(control, control[1:])]
+        left.append(control[0])
+        right.append(control[-1])
+    return tuple(left), tuple(reversed(right))
+
+
+def _hull_visible(control, viewport):
+    # Кривая лежит в выпуклой оболочке контрольных точек; запас в пиксель на округление
+    xs = [P[0] for P in control]
+    ys = [P[1] for P in control]
+    return clip.box_visible(min(xs) - 1, min(ys) - 1, max(xs) + 1, max(ys) + 1, viewport)
+
+
+def flatten_bezier(*control, tolerance=FLATNESS, viewport=None):
+    # Вершины ломаной, отклоняющейся от кривой Безье любой степени не больше чем на tolerance
+    vertices = [control[0]]
+    stack = [(control, 0)]
+    while stack:
+        control, depth = stack.pop()
+        # Невидимый кусок не делим: его хорда тоже лежит в оболочке и будет отсечена
+        if (depth >= MAX_DEPTH or _is_flat(control, tolerance)
+                or viewport is not None and not _hull_visible(control, viewport)):
+            vertices.append(control[-1])
+            continue
+        left, right = _split(control)
+        stack.append((right, depth + 1))
+        stack.append((left, depth + 1))
+    return vertices
+
+
+def curve_points(basis, geometry, tolerance=FLATNESS, viewport=None):
+    # Одна кривая тем же равномерным разбиением, что и в пакете: пошаговая
+    # отрисовка и перерисовка сцены ставят одни и те же пиксели
+    points, _ = curve_points_batch(basis, [geometry], tolerance, viewport)
+    return [tuple(p) for p in points.tolist()]
+
+
+def bezier_points(P0, P1, P2, P3, tolerance=FLATNESS, viewport=None):
+    return curve_points("bezier", (P0, P1, P2, P3), tolerance, viewport)
+
+
+def hermite_points(P0, P1, T0, T1, tolerance=FLATNESS, viewport=None):
+    return curve_points("hermite", (P0, P1, T0, T1), tolerance, viewport)
+
+
+def bspline_points(control_points, tolerance=FLATNESS, viewport=None):
+    vertices = []
+    for i in range(len(control_points) - 3):
+        segment = flatten_bezier(*bspline_to_bezier(*control_points[i:i + 4]), tolerance=tolerance,
+                                 viewport=viewport)
+        vertices.extend(segment if not vertices else segment[1:])
+    return bresenham.polyline_points(vertices, viewport)
+
+
+def basis_table(basis, samples):
+    key = (basis, samples)
+    table = _tables.get(key)
+    if table is None:
+        t = np.linspace(0.0, 1.0, samples)
+        powers = np.stack([t * t * t, t * t, t, np.ones_like(t)], axis=1)
+        table = powers @ BASES[basis]
+        _tables[key] = table
+    return table
+
+
+def evaluate(basis, geometry, samples):
+    geometry = np.asarray(geometry, dtype=np.float64).reshape(-1, 4, 2)
+    return basis_table(basis, samples) @ geometry
+
+
+def to_bezier(basis, geometry):
+    geometry = np.asarray(geometry, dtype=np.float64).reshape(-1, 4, 2)
+    return TO_BEZIER[basis] @ geometry
+
+
+def bspline_geometry(control_points):
+    control_points = np.asarray(control_points, dtype=np.float64).reshape(-1, 2)
+    if len(control_points) < 4:
+        return np.zeros((0, 4, 2))
+    return np.lib.stride_tricks.sliding_window_view(control_points, 4, axis=0).transpose(0, 2, 1)
+
+
+def curve_points_batch(basis, geometry, tolerance=FLATNESS, viewport=None):
+    # Хорды равномерного разбиения на n частей отклоняются от кубической кривой
+    # не больше чем на 3 * max|P[i] - 2P[i+1] + P[i+2]| / (4 * n^2) (P - точки Безье).
+    # n округляется до степени двойки, чтобы кривые одной группы вычислялись
+    # одним умножением на общую таблицу базиса
+    geometry = np.asarray(geometry, dtype=np.float64).reshape(-1, 4, 2)
+    n = len(geometry)
+    bez = to_bezier(basis, geometry)
+    second = np.linalg.norm(bez[:, :-2] - 2 * bez[:, 1:-1] + bez[:, 2:], axis=2).max(axis=1, initial=0.0)
+    needed = np.maximum(np.ceil(np.sqrt(3 * second / (4 * tolerance))), 1).astype(np.int64)
+    samples = 1 + (1 << np.ceil(np.log2(needed)).astype(np.int64))
+    if viewport is not None:
+        # Кривые, чья оболочка Безье не задевает окно, не вычисляем вовсе
+        lo = bez.min(axis=1, initial=np.inf) - 1
+        hi = bez.max(axis=1, initial=-np.inf) + 1
+        samples[~clip.box_visible_mask(lo[:, 0], lo[:, 1], hi[:, 0], hi[:, 1], viewport)] = 0
+
+    vertices, owners = [], []
+    for count in np.unique(samples[samples > 0]):
+        idx = np.nonzero(samples == count)[0]
+        vertices.append(evaluate(basis, geometry[idx], int(count)).reshape(-1, 2))
+        owners.append(np.repeat(idx, count))
+    vertices = np.concatenate(vertices) if vertices else np.zeros((0, 2))
+    owners = np.concatenate(owners) if owners else np.zeros(0, dtype=np.int64)
+    # Каждая кривая - ломаная по своим точкам, все ломаные растеризуются одним пакетом
+    vertices = vertices[np.argsort(owners, kind="stable")]
+    offsets = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(np.bincount(owners, minlength=n), out=offsets[1:])
+    return bresenham.polyline_points_batch(vertices, offsets, viewport)
+
+
+def draw_curves(canvas, basis, geometry):
+    fb = framebuffer.get_framebuffer(canvas)
+    points, _ = curve_points_batch(basis, geometry, viewport=fb.viewport())
+    fb.plot_points(points)
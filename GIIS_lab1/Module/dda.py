@@ -1,29 +1,86 @@
-import time
+import numpy as np
+
+import Module.clip as clip
+import Module.framebuffer as framebuffer
+import Module.stepper as stepper
 
-def draw_line(canvas, x0, y0, x1, y1, debug=False):
 
+def line_points(x0, y0, x1, y1, viewport=None, trace=None):
+    if trace is not None:
+        trace.begin(("x", "y", "fx", "fy"), "d")
     dx = x1 - x0
     dy = y1 - y0
 
     steps = int(max(abs(dx), abs(dy)))
     if steps == 0:
-        canvas.create_rectangle(round(x0), round(y0), round(x0) + 1, round(y0) + 1, fill="black", outline="black")
+        if trace is not None:
+            trace.append(round(x0), round(y0), x0, y0)
+        if viewport is None or clip.inside(round(x0), round(y0), viewport):
+            yield round(x0), round(y0)
         return
 
     x_inc = dx / steps
     y_inc = dy / steps
 
-    x, y = x0, y0
+    first, last = 0, steps
+    if viewport is not None:
+        step_range = clip.step_range(x0, y0, x1, y1, steps, viewport)
+        if step_range is None:
+            return
+        first, last = step_range
+
+    # Координаты шага i считаются как x0 + i * x_inc, а не накоплением суммы:
+    # первый видимый шаг получается сразу, а отсечённый отрезок совпадает с полным
+    for i in range(first, last + 1):
+        x = x0 + i * x_inc
+        y = y0 + i * y_inc
+        if trace is not None:
+            trace.append(round(x), round(y), x, y)
+        if viewport is None or clip.inside(round(x), round(y), viewport):
+            yield round(x), round(y)
 
-    for i in range(steps + 1):
-        canvas.create_rectangle(round(x), round(y), round(x) + 1, round(y) + 1, fill="black", outline="black")
 
-        if debug:
-            canvas.update()
-            time.sleep(0.05)
+def line_points_batch(segments, viewport=None):
+    segments = np.asarray(segments, dtype=np.float64).reshape(-1, 4)
+    x0, y0, x1, y1 = segments.T
+    dx = x1 - x0
+    dy = y1 - y0
+    steps = np.maximum(np.abs(dx), np.abs(dy)).astype(np.int64)
+    safe_steps = np.maximum(steps, 1)
+    x_inc = dx / safe_steps
+    y_inc = dy / safe_steps
 
-        x += x_inc
-        y += y_inc
+    first = np.zeros(len(segments), dtype=np.int64)
+    last = steps
+    if viewport is not None:
+        # Считаются только шаги, на которых отрезок может быть виден
+        first, last = clip.step_range_batch(segments, steps, viewport)
+    counts = np.maximum(last - first + 1, 0)
+    offsets = np.zeros(len(segments) + 1, dtype=np.int64)
+    np.cumsum(counts, out=offsets[1:])
 
+    # Та же формула x0 + i * x_inc, что и в line_points, поэтому округление совпадает попиксельно
+    seg = np.repeat(np.arange(len(segments)), counts)
+    i = first[seg] + np.arange(offsets[-1]) - offsets[seg]
+    points = np.empty((offsets[-1], 2), dtype=np.int64)
+    points[:, 0] = np.rint(x0[seg] + i * x_inc[seg])
+    points[:, 1] = np.rint(y0[seg] + i * y_inc[seg])
+    if viewport is not None:
+        return clip.filter_batch(points, offsets, viewport)
+    return points, offsets
 
 
+def draw_lines(canvas, segments):
+    fb = framebuffer.get_framebuffer(canvas)
+    points, _ = line_points_batch(segments, fb.viewport())
+    fb.plot_points(points)
+
+
+def draw_line(canvas, x0, y0, x1, y1, debug=False):
+    fb = framebuffer.get_framebuffer(canvas)
+    points = line_points(x0, y0, x1, y1, fb.viewport())
+    if debug:
+        stepper.animate(canvas, points)
+        return
+    for x, y in points:
+        fb.plot(x, y)
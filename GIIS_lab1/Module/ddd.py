@@ -1,49 +1,182 @@
 import tkinter as tk
+from tkinter import filedialog, messagebox
 import numpy as np
 import math
+import os
+import sys
+
+import Module.bresenham as bresenham
+import Module.framebuffer as framebuffer
+import Module.obj_file as obj_file
+import Module.zbuffer as zbuffer
+
+# Ближняя плоскость отсечения: глубина z + d, ближе которой к камере рёбра
+# обрезаются. Без неё точки у камеры и за ней проецируются в бесконечность
+NEAR = 1.0
+# Допуск сравнения глубины ребра с гранью в режиме невидимых линий
+DEPTH_BIAS = 0.001
+# Режимы отображения: каркас, заливка с z-буфером, каркас без невидимых линий
+MODES = ("wireframe", "solid", "hidden")
 
 class Object3D:
+    # Вершины хранятся в исходном виде и не меняются. Положение модели задают
+    # перенос, ориентация-кватернион и масштаб вдоль осей модели; из них
+    # собирается матрица модели, которая применяется один раз при проекции
     def __init__(self):
-        self.vertices = np.array([])
-        self.edges = []
+        self.vertices = np.zeros((0, 3), dtype=np.float32)
+        self.edges = np.zeros((0, 2), dtype=np.int32)
+        self.faces = np.zeros((0, 3), dtype=np.int32)
+        self.reset()
+
+    def reset(self):
+        self.translation = np.zeros(3)
+        self.orientation = np.array([1.0, 0.0, 0.0, 0.0])
+        self.scale = np.ones(3)
+        self._model = None
 
     def load_from_file(self, filename):
-        verts = []
-        edges = []
-        with open(filename, "r") as f:
-            for line in f:
-                parts = line.strip().split()
-                if not parts:
-                    continue
-                if parts[0] == "v" and len(parts) >= 4:
-                    x, y, z = map(float, parts[1:4])
-                    verts.append([x, y, z, 1.0])
-                elif parts[0] == "e" and len(parts) >= 3:
-                    i, j = map(int, parts[1:3])
-                    edges.append((i, j))
-        if verts:
-            self.vertices = np.array(verts)
-        else:
-            self.vertices = np.array([])
-        self.edges = edges
+        # Wavefront OBJ (v, f, l) или формат редактора (v, e); рёбра уже без
+        # повторов, грани разбиты на треугольники, номера вершин проверены
+        self.vertices, self.edges, self.faces = obj_file.load(filename)
+        self.vertices.flags.writeable = False
+        self.reset()
 
-    def transform(self, matrix):
-        if self.vertices.size == 0:
-            return
-        self.vertices = (matrix @ self.vertices.T).T
+    def translate(self, tx, ty, tz):
+        self.translation = self.translation + (tx, ty, tz)
+        self._model = None
+
+    def rotate(self, axis, angle):
+        # Поворот вокруг оси мира через начало координат: поворачиваются и
+        # ориентация, и перенос. Кватернион нормируется, поэтому после тысяч
+        # поворотов модель не искажается
+        turn = axis_quaternion(axis, angle)
+        self.orientation = quaternion_multiply(turn, self.orientation)
+        self.orientation /= np.linalg.norm(self.orientation)
+        self.translation = quaternion_matrix(turn)[:3, :3] @ self.translation
+        self._model = None
+
+    def rescale(self, sx, sy, sz):
+        # Масштаб относительно начала координат; форма меняется вдоль осей модели
+        self.translation = self.translation * (sx, sy, sz)
+        self.scale = self.scale * (sx, sy, sz)
+        self._model = None
+
+    def model_matrix(self):
+        if self._model is None:
+            self._model = (translation_matrix(*self.translation) @ quaternion_matrix(self.orientation)
+                           @ scaling_matrix(*self.scale))
+        return self._model
+
+    def clip_coordinates(self, d=300):
+        # Однородные координаты (X, Y, W) = (x d, y d, z + d) всех вершин: матрица
+        # модели и перспектива собраны в одну матрицу и применяются за один проход
+        matrix = perspective_matrix(d) @ self.model_matrix()
+        return self.vertices @ matrix[:, :3].T + matrix[:, 3]
 
-    def get_projected_vertices(self, d=300):
-        projected = []
-        for v in self.vertices:
-            x, y, z, w = v
-            factor = d / (z + d) if (z + d) != 0 else 1
-            xp = x * factor
-            yp = y * factor
-            projected.append((xp, yp))
-        return projected
+    def edge_segments(self, d=300, box=None, depth=False):
+        # Отрезки рёбер (x0, y0, x1, y1) после отсечения ближней плоскостью и,
+        # если задан box = (xmin, ymin, xmax, ymax), пирамидой видимости
+        clip = self.clip_coordinates(d)
+        return clip_edges(clip[self.edges[:, 0]], clip[self.edges[:, 1]], box, depth)
 
+    def front_faces(self, d=300):
+        # Треугольники, повёрнутые к камере лицевой стороной (обход против часовой
+        # стрелки снаружи, как в OBJ), после отсечения ближней плоскостью. Определитель
+        # из строк (X, Y, W) вершин равен d^2 (a - камера) . n и у лицевых граней
+        # отрицателен. Возвращает номер грани у каждого треугольника и их вершины (k, 3, 3) в (X, Y, W)
+        corners = self.clip_coordinates(d)[self.faces]
+        facing = np.einsum("ij,ij->i", corners[:, 0], np.cross(corners[:, 1], corners[:, 2])) < 0
+        front = np.nonzero(facing)[0]
+        corners, source = clip_triangles(corners[front])
+        return front[source], corners
 
 
+def clip_edges(start, end, box=None, depth=False):
+    # Отсечение отрезков в однородных координатах (X, Y, W) сразу для всех рёбер:
+    # для каждой плоскости a X + b Y + c W + e >= 0 концы, лежащие снаружи,
+    # сдвигаются к точке пересечения, как в алгоритме Лянга-Барски
+    planes = [(0, 0, 1, -NEAR)]
+    if box is not None:
+        xmin, ymin, xmax, ymax = box
+        planes += [(1, 0, -xmin, 0), (-1, 0, xmax, 0), (0, 1, -ymin, 0), (0, -1, ymax, 0)]
+    t0 = np.zeros(len(start))
+    t1 = np.ones(len(start))
+    visible = np.ones(len(start), dtype=bool)
+    for a, b, c, e in planes:
+        d0 = start @ (a, b, c) + e
+        d1 = end @ (a, b, c) + e
+        visible &= (d0 >= 0) | (d1 >= 0)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            t = d0 / (d0 - d1)
+        t0 = np.where(d0 < 0, np.maximum(t0, t), t0)
+        t1 = np.where(d1 < 0, np.minimum(t1, t), t1)
+    visible &= t0 <= t1
+    start, end, t0, t1 = start[visible], end[visible], t0[visible, None], t1[visible, None]
+    delta = end - start
+    p0 = start + t0 * delta
+    p1 = start + t1 * delta
+    segments = np.hstack([p0[:, :2] / p0[:, 2:], p1[:, :2] / p1[:, 2:]])
+    if depth:
+        # Ещё 1 / W концов - глубина, линейная вдоль отрезка на экране
+        return segments, 1 / np.hstack([p0[:, 2:], p1[:, 2:]])
+    return segments
+
+
+def _near_point(p, q):
+    # Точка отрезка p-q на ближней плоскости W = NEAR
+    t = ((NEAR - p[:, 2]) / (q[:, 2] - p[:, 2]))[:, None]
+    point = p + t * (q - p)
+    point[:, 2] = NEAR
+    return point
+
+
+def clip_triangles(corners):
+    # Отсечение треугольников (k, 3, 3) в (X, Y, W) ближней плоскостью, как у рёбер
+    # в clip_edges: с одной вершиной перед плоскостью остаётся меньший треугольник,
+    # с двумя - четырёхугольник из двух треугольников. Вершины поворачиваются по
+    # циклу, поэтому обход сохраняется. Возвращает треугольники и номер исходного у каждого
+    inside = corners[:, :, 2] >= NEAR
+    count = inside.sum(axis=1)
+    whole = np.nonzero(count == 3)[0]
+    triangles, source = [corners[whole]], [whole]
+    for n in (1, 2):
+        index = np.nonzero(count == n)[0]
+        if len(index) == 0:
+            continue
+        # Первой ставится вершина, единственная по свою сторону плоскости
+        first = np.argmax(inside[index] if n == 1 else ~inside[index], axis=1)
+        order = (first[:, None] + np.arange(3)) % 3
+        a, b, c = corners[index[:, None], order].transpose(1, 0, 2)
+        if n == 1:
+            triangles.append(np.stack([a, _near_point(a, b), _near_point(a, c)], axis=1))
+            source.append(index)
+        else:
+            ca, ab = _near_point(c, a), _near_point(a, b)
+            triangles += [np.stack([b, c, ca], axis=1), np.stack([b, ca, ab], axis=1)]
+            source += [index, index]
+    return np.concatenate(triangles), np.concatenate(source)
+
+
+def draw_wireframe(canvas, obj, d=300):
+    # Все рёбра - один пакет отрезков в кадровый буфер холста, начало координат
+    # в центре. Рёбра вне экрана отбрасываются ещё до растеризации
+    fb = framebuffer.get_framebuffer(canvas)
+    fb.clear()
+    w = fb.width / 2
+    h = fb.height / 2
+    segments = obj.edge_segments(d, (-w - 1, -h - 1, w + 1, h + 1))
+    segments[:, 0::2] += w
+    segments[:, 1::2] += h
+    bresenham.draw_lines(canvas, np.rint(segments))
+
+def perspective_matrix(d):
+    # Камера в точке (0, 0, -d), экран - плоскость z = 0: строки X, Y и W
+    return np.array([
+        [d, 0, 0, 0],
+        [0, d, 0, 0],
+        [0, 0, 1, d]
+    ])
+
 def translation_matrix(tx, ty, tz):
     return np.array([
         [1, 0, 0, tx],
@@ -60,45 +193,93 @@ def scaling_matrix(sx, sy, sz):
         [0,  0,  0, 1]
     ])
 
-def rotation_matrix_x(angle):
-    c = math.cos(angle)
-    s = math.sin(angle)
-    return np.array([
-        [1, 0,  0, 0],
-        [0, c, -s, 0],
-        [0, s,  c, 0],
-        [0, 0,  0, 1]
-    ])
+def axis_quaternion(axis, angle):
+    # Кватернион (w, x, y, z) поворота на angle вокруг единичной оси
+    s = math.sin(angle / 2)
+    return np.array([math.cos(angle / 2), axis[0] * s, axis[1] * s, axis[2] * s])
 
-def rotation_matrix_y(angle):
-    c = math.cos(angle)
-    s = math.sin(angle)
+def quaternion_multiply(a, b):
+    w1, x1, y1, z1 = a
+    w2, x2, y2, z2 = b
     return np.array([
-        [ c, 0, s, 0],
-        [ 0, 1, 0, 0],
-        [-s, 0, c, 0],
-        [ 0, 0, 0, 1]
+        w1 * w2 - x1 * x2 - y1 * y2 - z1 * z2,
+        w1 * x2 + x1 * w2 + y1 * z2 - z1 * y2,
+        w1 * y2 - x1 * z2 + y1 * w2 + z1 * x2,
+        w1 * z2 + x1 * y2 - y1 * x2 + z1 * w2
     ])
 
-def rotation_matrix_z(angle):
-    c = math.cos(angle)
-    s = math.sin(angle)
+def quaternion_matrix(q):
+    w, x, y, z = q
     return np.array([
-        [c, -s, 0, 0],
-        [s,  c, 0, 0],
-        [0,  0, 1, 0],
-        [0,  0, 0, 1]
+        [1 - 2 * (y * y + z * z), 2 * (x * y - w * z), 2 * (x * z + w * y), 0],
+        [2 * (x * y + w * z), 1 - 2 * (x * x + z * z), 2 * (y * z - w * x), 0],
+        [2 * (x * z - w * y), 2 * (y * z + w * x), 1 - 2 * (x * x + y * y), 0],
+        [0, 0, 0, 1]
     ])
 
+def shade(corners, d=300):
+    # Серый цвет грани по углу между нормалью и лучом зрения: чем прямее
+    # грань смотрит на камеру, тем светлее
+    r = corners * (1 / d, 1 / d, 1)
+    normal = np.cross(r[:, 1] - r[:, 0], r[:, 2] - r[:, 0])
+    cos = -np.einsum("ij,ij->i", r[:, 0], normal) / (np.linalg.norm(r[:, 0], axis=1) * np.linalg.norm(normal, axis=1))
+    level = (60 + 180 * np.clip(cos, 0, 1)).astype(np.uint8)
+    return np.repeat(level[:, None], 3, axis=1)
+
+def draw_solid(canvas, obj, d=300, hidden_lines=False):
+    # Грани с отсечением нелицевых и z-буфером. hidden_lines=False - заливка
+    # гранями, True - только рёбра, не закрытые гранями
+    if len(obj.faces) == 0:
+        draw_wireframe(canvas, obj, d)
+        return
+    fb = framebuffer.get_framebuffer(canvas)
+    fb.clear()
+    w = fb.width / 2
+    h = fb.height / 2
+    front, corners = obj.front_faces(d)
+    xy = corners[:, :, :2] / corners[:, :, 2:] + (w, h)
+    depth, owner = zbuffer.rasterize(xy, 1 / corners[:, :, 2], fb.width, fb.height)
+    if not hidden_lines:
+        ys, xs = np.nonzero(owner >= 0)
+        fb.plot_colors(np.stack([xs, ys], axis=1), shade(corners, d)[owner[ys, xs]])
+        return
+    segments, inv_w = obj.edge_segments(d, (-w - 1, -h - 1, w + 1, h + 1), depth=True)
+    segments[:, 0::2] += w
+    segments[:, 1::2] += h
+    points, offsets = bresenham.line_points_batch(np.rint(segments), fb.viewport())
+    # Глубина каждой точки ребра - по её положению между концами
+    edge = np.repeat(np.arange(len(segments)), np.diff(offsets))
+    start = segments[edge, :2]
+    along = segments[edge, 2:] - start
+    length = np.einsum("ij,ij->i", along, along)
+    t = np.clip(np.einsum("ij,ij->i", points - start, along) / np.where(length > 0, length, 1), 0, 1)
+    z = inv_w[edge, 0] + t * (inv_w[edge, 1] - inv_w[edge, 0])
+    inside = (points[:, 0] >= 0) & (points[:, 0] < fb.width) & (points[:, 1] >= 0) & (points[:, 1] < fb.height)
+    points, z = points[inside], z[inside]
+    # Ребро лежит на самих гранях, и после округления до пикселей его глубина
+    # сравнивается с соседней гранью. Поэтому точка видна, если она не дальше
+    # хотя бы одного пикселя из окрестности 3x3
+    padded = np.pad(depth, 1)
+    nearest = depth.copy()
+    for dy in range(3):
+        for dx in range(3):
+            np.minimum(nearest, padded[dy:dy + fb.height, dx:dx + fb.width], out=nearest)
+    fb.plot_points(points[z >= nearest[points[:, 1], points[:, 0]] * (1 - DEPTH_BIAS)])
+
+
 class Editor3D:
     def __init__(self, master, object_file=None):
         self.master = master
         self.canvas = tk.Canvas(master, width=600, height=600, bg="white")
         self.canvas.pack(fill=tk.BOTH, expand=True)
+        menu_bar = tk.Menu(master)
+        master.config(menu=menu_bar)
+        menu_bar.add_command(label="Открыть модель...", command=self.open_model)
         self.obj = Object3D()
         if object_file:
-            self.obj.load_from_file(object_file)
+            self.load(object_file)
         self.d = 300
+        self.mode = MODES[0]
         self.bind_keys()
         self.draw()
 
@@ -108,6 +289,8 @@ class Editor3D:
         w и s – поворот вокруг X
         a и d – поворот вокруг Y
         z и x – поворот вокруг Z
+        r – исходное положение
+        v – каркас / заливка / каркас без невидимых линий
         """
         self.master.bind("<Left>", lambda event: self.translate(-10, 0, 0))
         self.master.bind("<Right>", lambda event: self.translate(10, 0, 0))
@@ -122,49 +305,64 @@ class Editor3D:
         self.master.bind("z", lambda event: self.rotate_z(math.radians(-10)))
         self.master.bind("x", lambda event: self.rotate_z(math.radians(10)))
         self.master.bind("p", lambda event: self.draw())
+        self.master.bind("r", lambda event: self.reset())
+        self.master.bind("v", lambda event: self.next_mode())
+
+    def load(self, filename):
+        self.obj.load_from_file(filename)
+        self.master.title(f"3D Редактор - {os.path.basename(filename)} "
+                          f"({len(self.obj.vertices)} вершин, {len(self.obj.edges)} рёбер, "
+                          f"{len(self.obj.faces)} треугольников)")
+
+    def open_model(self):
+        path = filedialog.askopenfilename(filetypes=[("Модель", "*.obj *.txt"), ("Все файлы", "*")])
+        if not path:
+            return
+        try:
+            self.load(path)
+        except ValueError as e:
+            messagebox.showerror("Ошибка", str(e))
+            return
+        self.draw()
 
     def translate(self, tx, ty, tz):
-        T = translation_matrix(tx, ty, tz)
-        self.obj.transform(T)
+        self.obj.translate(tx, ty, tz)
         self.draw()
 
     def scale(self, sx, sy, sz):
-        S = scaling_matrix(sx, sy, sz)
-        self.obj.transform(S)
+        self.obj.rescale(sx, sy, sz)
         self.draw()
 
     def rotate_x(self, angle):
-        R = rotation_matrix_x(angle)
-        self.obj.transform(R)
+        self.obj.rotate((1, 0, 0), angle)
         self.draw()
 
     def rotate_y(self, angle):
-        R = rotation_matrix_y(angle)
-        self.obj.transform(R)
+        self.obj.rotate((0, 1, 0), angle)
         self.draw()
 
     def rotate_z(self, angle):
-        R = rotation_matrix_z(angle)
-        self.obj.transform(R)
+        self.obj.rotate((0, 0, 1), angle)
+        self.draw()
+
+    def reset(self):
+        self.obj.reset()
+        self.draw()
+
+    def next_mode(self):
+        self.mode = MODES[(MODES.index(self.mode) + 1) % len(MODES)]
         self.draw()
 
     def draw(self):
-        self.canvas.delete("all")
-        pts = self.obj.get_projected_vertices(self.d)
-        w = self.canvas.winfo_width() / 2
-        h = self.canvas.winfo_height() / 2
-        pts_centered = [(x + w, y + h) for (x, y) in pts]
-        for edge in self.obj.edges:
-            i, j = edge
-            if i < len(pts_centered) and j < len(pts_centered):
-                x0, y0 = pts_centered[i]
-                x1, y1 = pts_centered[j]
-                self.canvas.create_line(x0, y0, x1, y1, fill="black")
+        if self.mode == "wireframe":
+            draw_wireframe(self.canvas, self.obj, self.d)
+        else:
+            draw_solid(self.canvas, self.obj, self.d, hidden_lines=self.mode == "hidden")
 
 def main():
     root = tk.Tk()
     root.title("3D Редактор")
-    editor = Editor3D(root, object_file="object.txt")
+    editor = Editor3D(root, object_file=sys.argv[1] if len(sys.argv) > 1 else "object.txt")
     root.mainloop()
 
 if __name__ == "__main__":
@@ -1,8 +1,21 @@
-import time
 import math
 
+import numpy as np
+
+import Module.clip as clip
+import Module.framebuffer as framebuffer
+import Module.stepper as stepper
+
+
+def ellipse_points(cx, cy, rx, ry, viewport=None, trace=None):
+    if viewport is not None:
+        if not clip.box_visible(cx - rx, cy - ry, cx + rx, cy + ry, viewport):
+            return
+        for x, y in ellipse_points(cx, cy, rx, ry, trace=trace):
+            if clip.inside(x, y, viewport):
+                yield x, y
+        return
 
-def draw_ellipse(canvas, cx, cy, rx, ry, debug=False):
     x = 0
     y = ry
     rx2 = rx * rx
@@ -10,12 +23,17 @@ def draw_ellipse(canvas, cx, cy, rx, ry, debug=False):
     d1 = ry2 - (rx2 * ry) + (0.25 * rx2)
     dx = 2 * ry2 * x
     dy = 2 * rx2 * y
+    if trace is not None:
+        trace.begin(("x", "y", "region", "d"), "d")
 
     while dx < dy:
-        plot_pixel(canvas, cx + x, cy + y, debug)
-        plot_pixel(canvas, cx - x, cy + y, debug)
-        plot_pixel(canvas, cx + x, cy - y, debug)
-        plot_pixel(canvas, cx - x, cy - y, debug)
+        if trace is not None:
+            trace.append(cx + x, cy + y, 1, d1, cx - x, cy + y, 1, d1,
+                         cx + x, cy - y, 1, d1, cx - x, cy - y, 1, d1)
+        yield cx + x, cy + y
+        yield cx - x, cy + y
+        yield cx + x, cy - y
+        yield cx - x, cy - y
 
         if d1 < 0:
             x += 1
@@ -31,10 +49,13 @@ def draw_ellipse(canvas, cx, cy, rx, ry, debug=False):
 
     d2 = (ry2) * ((x + 0.5) ** 2) + (rx2) * ((y - 1) ** 2) - (rx2 * ry2)
     while y >= 0:
-        plot_pixel(canvas, cx + x, cy + y, debug)
-        plot_pixel(canvas, cx - x, cy + y, debug)
-        plot_pixel(canvas, cx + x, cy - y, debug)
-        plot_pixel(canvas, cx - x, cy - y, debug)
+        if trace is not None:
+            trace.append(cx + x, cy + y, 2, d2, cx - x, cy + y, 2, d2,
+                         cx + x, cy - y, 2, d2, cx - x, cy - y, 2, d2)
+        yield cx + x, cy + y
+        yield cx - x, cy + y
+        yield cx + x, cy - y
+        yield cx - x, cy - y
 
         if d2 > 0:
             y -= 1
@@ -48,11 +69,91 @@ def draw_ellipse(canvas, cx, cy, rx, ry, debug=False):
             d2 = d2 + dx - dy + rx2
 
 
-def plot_pixel(canvas, x, y, debug):
-    canvas.create_rectangle(x, y, x + 1, y + 1, fill="black", outline="black")
-    if debug:
-        canvas.update()
-        time.sleep(0.02)
+QUADRANTS = np.array([(1, 1), (-1, 1), (1, -1), (-1, -1)])
+KEEP_X0 = np.array([1, 0, 1, 0], dtype=bool)
+KEEP_Y0 = np.array([1, 1, 0, 0], dtype=bool)
+
+
+def ellipse_points_batch(centers, rx, ry, viewport=None):
+    centers = np.asarray(centers, dtype=np.int64).reshape(-1, 2)
+    n = len(centers)
+    if viewport is not None:
+        rx = np.broadcast_to(np.asarray(rx, dtype=np.int64), (n,))
+        ry = np.broadcast_to(np.asarray(ry, dtype=np.int64), (n,))
+        visible = clip.box_visible_mask(centers[:, 0] - rx, centers[:, 1] - ry,
+                                        centers[:, 0] + rx, centers[:, 1] + ry, viewport)
+        points, offsets = ellipse_points_batch(centers[visible], rx[visible], ry[visible])
+        return clip.filter_batch(points, offsets, viewport, visible)
+    rx2 = np.broadcast_to(np.asarray(rx, dtype=np.int64), (n,)) ** 2
+    ry = np.broadcast_to(np.asarray(ry, dtype=np.int64), (n,))
+    ry2 = ry ** 2
+
+    # Тот же алгоритм средней точки, но шаг делают сразу все эллипсы пакета.
+    # Решающие переменные умножены на 4, чтобы 0.25 из d1 и 0.5 из d2 стали целыми
+    x = np.zeros(n, dtype=np.int64)
+    y = ry.copy()
+    d1 = 4 * ry2 - 4 * rx2 * ry + rx2
+    owners, xs, ys = [], [], []
+
+    active = np.nonzero(ry2 * x < rx2 * y)[0]
+    while len(active):
+        owners.append(active)
+        xs.append(x[active])
+        ys.append(y[active])
+        step_y = d1[active] >= 0
+        x[active] += 1
+        y[active] -= step_y
+        d1[active] += 4 * (2 * ry2[active] * x[active] + ry2[active])
+        d1[active] -= (8 * rx2[active] * y[active]) * step_y
+        active = active[ry2[active] * x[active] < rx2[active] * y[active]]
 
+    d2 = ry2 * (2 * x + 1) ** 2 + 4 * rx2 * (y - 1) ** 2 - 4 * rx2 * ry2
+    active = np.nonzero(y >= 0)[0]
+    while len(active):
+        owners.append(active)
+        xs.append(x[active])
+        ys.append(y[active])
+        step_x = d2[active] <= 0
+        y[active] -= 1
+        x[active] += step_x
+        d2[active] += 4 * (rx2[active] - 2 * rx2[active] * y[active])
+        d2[active] += (8 * ry2[active] * x[active]) * step_x
+        active = active[y[active] >= 0]
+
+    owner = np.concatenate(owners) if owners else np.zeros(0, dtype=np.int64)
+    order = np.argsort(owner, kind="stable")
+    owner = owner[order]
+    x = np.concatenate(xs)[order] if xs else owner
+    y = np.concatenate(ys)[order] if ys else owner
+
+    keep = np.ones((len(x), 4), dtype=bool)
+    keep &= (x != 0)[:, None] | KEEP_X0
+    keep &= (y != 0)[:, None] | KEEP_Y0
+    owner = np.broadcast_to(owner[:, None], keep.shape)[keep]
+
+    points = np.empty((int(keep.sum()), 2), dtype=np.int64)
+    points[:, 0] = (x[:, None] * QUADRANTS[:, 0])[keep] + centers[owner, 0]
+    points[:, 1] = (y[:, None] * QUADRANTS[:, 1])[keep] + centers[owner, 1]
+    offsets = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(np.bincount(owner, minlength=n), out=offsets[1:])
+    return points, offsets
+
+
+def draw_ellipses(canvas, centers, rx, ry):
+    fb = framebuffer.get_framebuffer(canvas)
+    points, _ = ellipse_points_batch(centers, rx, ry, fb.viewport())
+    fb.plot_points(points)
+
+
+def draw_ellipse(canvas, cx, cy, rx, ry, debug=False):
+    viewport = framebuffer.get_framebuffer(canvas).viewport()
+    points = ellipse_points(cx, cy, rx, ry, viewport)
+    if debug:
+        stepper.animate(canvas, points)
+        return
+    for x, y in points:
+        plot_pixel(canvas, x, y)
 
 
+def plot_pixel(canvas, x, y):
+    framebuffer.get_framebuffer(canvas).plot(x, y)
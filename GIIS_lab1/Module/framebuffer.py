@@ -0,0 +1,219 @@
+import numpy as np
+
+BLACK = (0, 0, 0)
+WHITE = (255, 255, 255)
+
+
+class FrameBuffer:
+    # offset_x, offset_y - положение буфера внутри большего изображения (в экранных
+    # пикселях), например для плитки офлайн-рендера; у окна редактора оно нулевое
+    def __init__(self, canvas, width, height, background=WHITE, offset_x=0, offset_y=0):
+        self.canvas = canvas
+        self.width = width
+        self.height = height
+        self.background = background
+        self.offset_x = offset_x
+        self.offset_y = offset_y
+        self.pixels = np.empty((height, width, 3), dtype=np.uint8)
+        self.pixels[:] = background
+        # Фото-изображение создаётся через Tcl напрямую, чтобы модуль не зависел от tkinter
+        self.image = canvas.tk.call("image", "create", "photo", "-width", width, "-height", height)
+        self.item = canvas.create_image(0, 0, image=self.image, anchor="nw")
+        self._flush_pending = False
+        self._reset_dirty()
+        self._mark_dirty(0, 0, width, height)
+
+    def _reset_dirty(self):
+        self.dirty_x0 = self.width
+        self.dirty_y0 = self.height
+        self.dirty_x1 = 0
+        self.dirty_y1 = 0
+
+    def _mark_dirty(self, x0, y0, x1, y1):
+        if x0 < self.dirty_x0:
+            self.dirty_x0 = x0
+        if y0 < self.dirty_y0:
+            self.dirty_y0 = y0
+        if x1 > self.dirty_x1:
+            self.dirty_x1 = x1
+        if y1 > self.dirty_y1:
+            self.dirty_y1 = y1
+        if not self._flush_pending:
+            self._flush_pending = True
+            self.canvas.after_idle(self.flush)
+
+    def plot(self, x, y, color=BLACK):
+        self.fill_rect(x, y, x + 1, y + 1, color)
+
+    def plot_span(self, x, y, length, axis, color=BLACK):
+        if axis == "x":
+            self.fill_rect(x, y, x + length, y + 1, color)
+        else:
+            self.fill_rect(x, y, x + 1, y + length, color)
+
+    def fill_rect(self, x0, y0, x1, y1, color=BLACK):
+        x0 = int(round(x0)) - self.offset_x
+        y0 = int(round(y0)) - self.offset_y
+        x1 = int(round(x1)) - self.offset_x
+        y1 = int(round(y1)) - self.offset_y
+        if x0 < 0:
+            x0 = 0
+        if y0 < 0:
+            y0 = 0
+        if x1 > self.width:
+            x1 = self.width
+        if y1 > self.height:
+            y1 = self.height
+        if x0 >= x1 or y0 >= y1:
+            return
+        self.pixels[y0:y1, x0:x1] = color
+        self._mark_dirty(x0, y0, x1, y1)
+
+    def _device_pixels(self, xs, ys):
+        # Координаты точек, попавших в буфер, и номера этих точек
+        xs = np.rint(xs).astype(np.int64) - self.offset_x
+        ys = np.rint(ys).astype(np.int64) - self.offset_y
+        source = np.nonzero((xs >= 0) & (xs < self.width) & (ys >= 0) & (ys < self.height))[0]
+        if len(source) == 0:
+            return None
+        return xs[source], ys[source], source
+
+    def plot_points(self, points, color=BLACK):
+        points = np.asarray(points)
+        if len(points) == 0:
+            return
+        device = self._device_pixels(points[:, 0], points[:, 1])
+        if device is None:
+            return
+        dev_x, dev_y, _ = device
+        self.pixels[dev_y, dev_x] = color
+        self._mark_dirty(int(dev_x.min()), int(dev_y.min()), int(dev_x.max()) + 1, int(dev_y.max()) + 1)
+
+    def plot_colors(self, points, colors):
+        # Как plot_points, но у каждой точки свой цвет: colors - массив (n, 3)
+        points = np.asarray(points)
+        if len(points) == 0:
+            return
+        device = self._device_pixels(points[:, 0], points[:, 1])
+        if device is None:
+            return
+        dev_x, dev_y, source = device
+        self.pixels[dev_y, dev_x] = np.asarray(colors)[source]
+        self._mark_dirty(int(dev_x.min()), int(dev_y.min()), int(dev_x.max()) + 1, int(dev_y.max()) + 1)
+
+    def blend(self, x, y, alpha, color=BLACK):
+        x = int(round(x)) - self.offset_x
+        y = int(round(y)) - self.offset_y
+        if not (0 <= x < self.width and 0 <= y < self.height) or alpha <= 0:
+            return
+        pixel = self.pixels[y, x].astype(np.int32)
+        pixel += ((np.array(color, dtype=np.int32) - pixel) * alpha + 127) // 255
+        self.pixels[y, x] = pixel
+        self._mark_dirty(x, y, x + 1, y + 1)
+
+    def blend_points(self, points, alpha, color=BLACK):
+        # Покрытия alpha (0..255) накапливаются как пропускание T = П(1 - a_i) по каждому
+        # пикселю, после чего пиксель один раз смешивается: dst * T + color * (1 - T).
+        # Это равносильно последовательному наложению всех фрагментов поверх старого цвета
+        points = np.asarray(points)
+        if len(points) == 0:
+            return
+        device = self._device_pixels(points[:, 0], points[:, 1])
+        if device is None:
+            return
+        dev_x, dev_y, source = device
+        flat = dev_y * self.width + dev_x
+        touched, inverse = np.unique(flat, return_inverse=True)
+        transmit = np.ones(len(touched))
+        np.multiply.at(transmit, inverse, 1.0 - np.asarray(alpha, dtype=np.float64)[source] / 255.0)
+        target = self.pixels.reshape(-1, 3)
+        dst = target[touched].astype(np.float64)
+        dst = dst * transmit[:, None] + np.array(color, dtype=np.float64) * (1.0 - transmit[:, None])
+        target[touched] = np.rint(dst).astype(np.uint8)
+        self._mark_dirty(int(dev_x.min()), int(dev_y.min()), int(dev_x.max()) + 1, int(dev_y.max()) + 1)
+
+    def viewport(self):
+        return self.offset_x, self.offset_y, self.offset_x + self.width, self.offset_y + self.height
+
+    def clear(self):
+        self.pixels[:] = self.background
+        self._mark_dirty(0, 0, self.width, self.height)
+
+    def resize(self, width, height):
+        if width == self.width and height == self.height:
+            return
+        pixels = np.empty((height, width, 3), dtype=np.uint8)
+        pixels[:] = self.background
+        w = min(width, self.width)
+        h = min(height, self.height)
+        pixels[:h, :w] = self.pixels[:h, :w]
+        self.pixels = pixels
+        self.width = width
+        self.height = height
+        self.canvas.tk.call(self.image, "configure", "-width", width, "-height", height)
+        self._reset_dirty()
+        self._mark_dirty(0, 0, width, height)
+
+    def flush(self):
+        self._flush_pending = False
+        x0, y0, x1, y1 = self.dirty_x0, self.dirty_y0, self.dirty_x1, self.dirty_y1
+        if x0 >= x1 or y0 >= y1:
+            return
+        region = self.pixels[y0:y1, x0:x1]
+        data = b"P6 %d %d 255\n" % (x1 - x0, y1 - y0) + region.tobytes()
+        self.canvas.tk.call(self.image, "put", data, "-format", "ppm", "-to", x0, y0)
+        self._reset_dirty()
+
+
+class NullCanvas:
+    # Заглушка холста без Tk для офлайн-отрисовки и замеров:
+    # кадровый буфер пишет в неё, а изображение никуда не выводится
+    def __init__(self, width, height):
+        self.width = width
+        self.height = height
+        self.tk = self
+
+    def call(self, *args):
+        return "image"
+
+    def create_image(self, *args, **kwargs):
+        return 1
+
+    def after_idle(self, callback):
+        pass
+
+    def after(self, delay, callback):
+        return None
+
+    def after_cancel(self, job):
+        pass
+
+    def update(self):
+        pass
+
+    def update_idletasks(self):
+        pass
+
+    def winfo_width(self):
+        return self.width
+
+    def winfo_height(self):
+        return self.height
+
+    def cget(self, option):
+        return self.width if option == "width" else self.height
+
+    def bind(self, *args, **kwargs):
+        pass
+
+
+def get_framebuffer(canvas):
+    fb = getattr(canvas, "framebuffer", None)
+    if fb is None:
+        canvas.update_idletasks()
+        width = max(canvas.winfo_width(), int(canvas.cget("width")))
+        height = max(canvas.winfo_height(), int(canvas.cget("height")))
+        fb = FrameBuffer(canvas, width, height)
+        canvas.framebuffer = fb
+        canvas.bind("<Configure>", lambda event: fb.resize(max(event.width, 1), max(event.height, 1)), add="+")
+    return fb
@@ -1,25 +1,88 @@
 import math
-import time
+
+import Module.clip as clip
+import Module.framebuffer as framebuffer
+import Module.stepper as stepper
+
+
+def hyperbola_points(cx, cy, a, b, viewport):
+    x_range = clip.mirrored_range(cx, viewport[0], viewport[2])
+    y_range = clip.mirrored_range(cy, viewport[1], viewport[3])
+    if x_range is None or y_range is None:
+        return
+    x_start, x_end = x_range
+    y_start, y_end = y_range
+    a = int(round(a))
+    b = int(round(b))
+
+    # Вырожденные случаи: при a = 0 ветви сливаются в прямую x = cx, при b = 0 в лучи y = cy
+    if a == 0:
+        if x_start == 0:
+            for y in range(y_start, y_end + 1):
+                yield from _reflect(cx, cy, 0, y, viewport)
+        return
+    if b == 0:
+        if y_start == 0:
+            for x in range(max(x_start, a), x_end + 1):
+                yield from _reflect(cx, cy, x, 0, viewport)
+        return
+
+    # Перепрыгиваем невидимую часть ветви: x(y) и y(x) монотонно растут.
+    # Начинаем на шаг по малой оси раньше окна - со строки y_start - 1 или со
+    # строки, где ветвь ещё левее столбца x_start. Ближайший к ветви пиксель этой
+    # строки лежит на пути алгоритма средней точки, решающие переменные зависят
+    # только от (x, y), поэтому дальше путь совпадает с путём без отсечения,
+    # а лишние пиксели отбрасывает проверка на попадание в окно
+    a2 = a * a
+    b2 = b * b
+    x_start = max(x_start, a)
+    y = max(y_start - 1, 0)
+    if x_start - 1 >= a:
+        y = max(y, math.isqrt(b2 * ((x_start - 1) ** 2 - a2)) // a)
+    x = (math.isqrt(4 * a2 * (b2 + y * y)) + b) // (2 * b)
+
+    region1 = b2 * x > a2 * y
+    d = b2 * (2 * x + 1) ** 2 - 4 * a2 * (y + 1) ** 2 - 4 * a2 * b2
+    e = 4 * b2 * (x + 1) ** 2 - a2 * (2 * y + 1) ** 2 - 4 * a2 * b2
+    while x <= x_end and y <= y_end:
+        if x >= x_start and y >= y_start:
+            yield from _reflect(cx, cy, x, y, viewport)
+
+        if region1:
+            if d < 0:
+                d += 8 * b2 * (x + 1)
+                x += 1
+            d -= 4 * a2 * (2 * y + 3)
+            y += 1
+            if b2 * x <= a2 * y:
+                region1 = False
+                e = 4 * b2 * (x + 1) ** 2 - a2 * (2 * y + 1) ** 2 - 4 * a2 * b2
+        else:
+            if e > 0:
+                e -= a2 * (8 * y + 8)
+                y += 1
+            e += 4 * b2 * (2 * x + 3)
+            x += 1
+
+
+def _reflect(cx, cy, x, y, viewport):
+    xs = (cx + x, cx - x) if x else (cx,)
+    ys = (cy + y, cy - y) if y else (cy,)
+    for px in xs:
+        for py in ys:
+            if clip.inside(px, py, viewport):
+                yield px, py
 
 
 def draw_hyperbola(canvas, cx, cy, a, b, debug=False):
-    t = 0.0
-    dt = 0.01
-    t_max = 1.0
-
-    while t <= t_max:
-        x_offset = a * math.cosh(t)
-        y_offset = b * math.sinh(t)
-        plot_pixel(canvas, cx + x_offset, cy + y_offset, debug)
-        plot_pixel(canvas, cx + x_offset, cy - y_offset, debug)
-        plot_pixel(canvas, cx - x_offset, cy + y_offset, debug)
-        plot_pixel(canvas, cx - x_offset, cy - y_offset, debug)
-        t += dt
-
-def plot_pixel(canvas, x, y, debug):
-    canvas.create_rectangle(x, y, x + 1, y + 1, fill="black", outline="black")
+    viewport = framebuffer.get_framebuffer(canvas).viewport()
+    points = hyperbola_points(cx, cy, a, b, viewport)
     if debug:
-        canvas.update()
-        time.sleep(0.02)
+        stepper.animate(canvas, points)
+        return
+    for x, y in points:
+        plot_pixel(canvas, x, y)
 
 
+def plot_pixel(canvas, x, y):
+    framebuffer.get_framebuffer(canvas).plot(x, y)
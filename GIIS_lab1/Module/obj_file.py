@@ -0,0 +1,245 @@
+import os
+import re
+
+import numpy as np
+
+# Рядом с моделью сохраняется разобранный результат: model.obj -> model.obj.npz.
+# Кэш действителен, пока у исходного файла те же размер и время изменения
+CACHE_SUFFIX = ".npz"
+CACHE_VERSION = 2
+CHUNK_BYTES = 1 << 24
+
+# Строки нужных видов вынимаются из куска файла регулярными выражениями,
+# а числа разбираются сразу для всех строк куска. Начало строки задано
+# символом \n, а не ^: по буквальному префиксу re ищет намного быстрее
+VERTEX_LINES = re.compile(rb"\nv[ \t]+([^\r\n]*)")
+FACE_LINES = re.compile(rb"\nf[ \t]+([^\r\n]*)")
+POLYLINE_LINES = re.compile(rb"\nl[ \t]+([^\r\n]*)")
+# Собственный формат редактора: "e i j" с номерами вершин от нуля
+EDGE_LINES = re.compile(rb"\ne[ \t]+([^\r\n]*)")
+# У вершины грани "v/vt/vn" нужен только номер v
+SLASHES = re.compile(rb"/\S*")
+# Комментарий может стоять и в конце строки с данными: "f 1 2 3 # верх"
+COMMENTS = re.compile(rb"#[^\r\n]*")
+
+
+def _text(data):
+    # latin-1 декодирует любые байты: не-ASCII в числах даст ошибку разбора, а не декодирования
+    return data.decode("latin-1")
+
+
+def _malformed(kind, body):
+    return ValueError(f"неверная строка: {kind} {body.decode('utf-8', 'replace').strip()}")
+
+
+def _vertices(bodies):
+    try:
+        values = np.fromstring(_text(b" ".join(bodies)), sep=" ")
+    except ValueError:
+        values = None
+    # Одного общего числа значений мало: строки разной длины могут дать ту же сумму
+    widths = set(map(len, map(bytes.split, bodies)))
+    width = widths.pop()
+    if values is not None and not widths and width >= 3 and len(values) == width * len(bodies):
+        return values.reshape(-1, width)[:, :3]
+    # Строки разной длины (например, часть вершин с цветом) или с ошибкой - медленный путь
+    vertices = np.empty((len(bodies), 3))
+    for i, body in enumerate(bodies):
+        try:
+            vertices[i] = [float(value) for value in body.split()[:3]]
+        except ValueError:
+            raise _malformed("v", body) from None
+    return vertices
+
+
+def _integers(kind, bodies, text):
+    try:
+        return np.fromstring(_text(text), dtype=np.int64, sep=" ")
+    except ValueError:
+        # Для сообщения ищется первая строка, в которой не только целые числа
+        for body in bodies:
+            if not all(value.lstrip(b"+-").isdigit() for value in SLASHES.sub(b"", body).split()):
+                raise _malformed(kind, body) from None
+        raise
+
+
+def _polygons(kind, bodies):
+    # Номера вершин всех строк подряд; в OBJ номер не бывает нулём,
+    # поэтому ноль отделяет строки друг от друга и стоит после последней
+    flat = _integers(kind, bodies, SLASHES.sub(b"", b" 0 ".join(bodies) + b" 0"))
+    if np.count_nonzero(flat == 0) != len(bodies):
+        for body in bodies:
+            if b"0" in SLASHES.sub(b"", body).split():
+                raise _malformed(kind, body)
+    return flat
+
+
+def _resolve(flat, line_vertices):
+    # Положительные номера считаются от 1, отрицательные - от последней вершины
+    # перед строкой; line_vertices - число вершин перед каждой строкой
+    line = np.cumsum(flat == 0) - (flat == 0)
+    before = line_vertices[line]
+    return np.where(flat < 0, before + flat, flat - 1)
+
+
+def _polygon_edges(flat, index, closed):
+    # Рёбра между соседними вершинами строки; у граней ещё и от последней к первой
+    end = flat == 0
+    at = np.nonzero(~end)[0]
+    inner = at[~end[at + 1]]
+    edges = [np.stack([index[inner], index[inner + 1]], axis=1)]
+    if closed:
+        first = at[(at == 0) | end[at - 1]]
+        last = at[end[at + 1]]
+        edges.append(np.stack([index[last], index[first]], axis=1))
+    return edges
+
+
+def _fan_triangles(flat, index):
+    # Грань из k вершин режется веером из первой вершины на k - 2 треугольника
+    end = flat == 0
+    at = np.nonzero(~end)[0]
+    line = np.cumsum(end)[at] - end[at]
+    first = at[(at == 0) | end[at - 1]]
+    inner = (at != first[line]) & ~end[at + 1]
+    fan = at[inner]
+    return np.stack([index[first[line[inner]]], index[fan], index[fan + 1]], axis=1)
+
+
+def _lines_before(pattern, chunk, vertex_pattern, count):
+    # Число вершин перед каждой строкой pattern: нужно только для отрицательных номеров
+    vertex_starts = [m.start() for m in vertex_pattern.finditer(chunk)]
+    starts = [m.start() for m in pattern.finditer(chunk)]
+    return count + np.searchsorted(vertex_starts, starts)
+
+
+def _parse_chunk(chunk, count):
+    # count - число вершин в предыдущих кусках; возвращает вершины, рёбра и треугольники куска
+    chunk = b"\n" + chunk
+    if b"#" in chunk:
+        chunk = COMMENTS.sub(b"", chunk)
+    bodies = VERTEX_LINES.findall(chunk)
+    vertices = _vertices(bodies) if bodies else np.zeros((0, 3))
+    edges = []
+    faces = []
+    for kind, pattern, closed in (("f", FACE_LINES, True), ("l", POLYLINE_LINES, False)):
+        bodies = pattern.findall(chunk)
+        if not bodies:
+            continue
+        flat = _polygons(kind, bodies)
+        if (flat < 0).any():
+            line_vertices = _lines_before(pattern, chunk, VERTEX_LINES, count)
+        else:
+            line_vertices = np.zeros(len(bodies), dtype=np.int64)
+        index = np.where(flat == 0, 0, _resolve(flat, line_vertices))
+        edges.extend(_polygon_edges(flat, index, closed))
+        if closed:
+            faces.append(_fan_triangles(flat, index))
+    bodies = EDGE_LINES.findall(chunk)
+    if bodies:
+        pairs = _integers("e", bodies, b" ".join(bodies))
+        if len(pairs) != 2 * len(bodies):
+            raise ValueError("в строке ребра должно быть два номера вершин")
+        edges.append(pairs.reshape(-1, 2))
+    return vertices, edges, faces
+
+
+def _unique_edges(edges, count):
+    # Ребро общей пары граней встречается дважды и в разных направлениях;
+    # рёбра нулевой длины (ломаная из одной вершины) отбрасываются
+    edges = np.sort(edges, axis=1)
+    edges = edges[edges[:, 0] != edges[:, 1]]
+    key = np.sort(edges[:, 0] * count + edges[:, 1])
+    key = key[np.concatenate([[True], key[1:] != key[:-1]])] if len(key) else key
+    return np.stack([key // count, key % count], axis=1)
+
+
+def _valid_faces(faces):
+    valid = (faces[:, 0] != faces[:, 1]) & (faces[:, 1] != faces[:, 2]) & (faces[:, 0] != faces[:, 2])
+    return faces[valid]
+
+
+def _in_range(index, count):
+    return len(index) == 0 or (index.min() >= 0 and index.max() < count)
+
+
+def _bad_reference(path, count):
+    # Номера вершин проверяются уже после разбора всего файла: положительный номер
+    # может ссылаться на вершину ниже по файлу. Строка с ошибкой ищется заново
+    # построчно - это нужно только для сообщения
+    vertices = 0
+    with open(path, "rb") as f:
+        for number, line in enumerate(f, 1):
+            fields = COMMENTS.sub(b"", line).split()
+            if not fields or fields[0] not in (b"v", b"f", b"l", b"e"):
+                continue
+            if fields[0] == b"v":
+                vertices += 1
+                continue
+            for field in fields[1:]:
+                value = int(SLASHES.sub(b"", field))
+                if fields[0] == b"e":
+                    index = value
+                else:
+                    index = vertices + value if value < 0 else value - 1
+                if not 0 <= index < count:
+                    return ValueError(f"{path}: строка {number}: нет вершины {value}")
+    return ValueError(f"{path}: ссылка на несуществующую вершину")
+
+
+def parse(path):
+    # Потоковый разбор: файл читается кусками по CHUNK_BYTES, обрезанными по концу строки
+    vertices, edges, faces = [], [], []
+    count = 0
+    with open(path, "rb") as f:
+        tail = b""
+        while True:
+            block = f.read(CHUNK_BYTES)
+            chunk = tail + block
+            if block:
+                cut = chunk.rfind(b"\n") + 1
+                chunk, tail = chunk[:cut], chunk[cut:]
+            if chunk:
+                try:
+                    chunk_vertices, chunk_edges, chunk_faces = _parse_chunk(chunk, count)
+                except ValueError as e:
+                    raise ValueError(f"{path}: {e}") from None
+                vertices.append(chunk_vertices)
+                edges.extend(chunk_edges)
+                faces.extend(chunk_faces)
+                count += len(chunk_vertices)
+            if not block:
+                break
+    vertices = np.concatenate(vertices or [np.zeros((0, 3))]).astype(np.float32)
+    edges = np.concatenate(edges or [np.zeros((0, 2), dtype=np.int64)])
+    faces = np.concatenate(faces or [np.zeros((0, 3), dtype=np.int64)])
+    if not (_in_range(edges, count) and _in_range(faces, count)):
+        raise _bad_reference(path, count)
+    return vertices, _unique_edges(edges, count).astype(np.int32), _valid_faces(faces).astype(np.int32)
+
+
+def _source_stamp(path):
+    stat = os.stat(path)
+    return np.array([CACHE_VERSION, stat.st_size, stat.st_mtime_ns], dtype=np.int64)
+
+
+def load(path):
+    # Возвращает (vertices float32 (n, 3), edges int32 (m, 2), faces int32 (k, 3));
+    # повторное открытие того же файла читает готовые массивы из кэша
+    cache = path + CACHE_SUFFIX
+    stamp = _source_stamp(path)
+    try:
+        with np.load(cache, allow_pickle=False) as data:
+            if np.array_equal(data["source"], stamp):
+                return data["vertices"], data["edges"], data["faces"]
+    except (OSError, KeyError, ValueError):
+        pass
+    vertices, edges, faces = parse(path)
+    try:
+        with open(cache + ".tmp", "wb") as f:
+            np.savez(f, source=stamp, vertices=vertices, edges=edges, faces=faces)
+        os.replace(cache + ".tmp", cache)
+    except OSError:
+        # Каталог только для чтения: работаем без кэша
+        pass
+    return vertices, edges, faces
@@ -0,0 +1,96 @@
+import numpy as np
+
+EMPTY = 0
+# Метка пикселя сглаженной линии: его владелец запоминается, но сплошной
+# пиксель другого примитива всё равно рисуется поверх
+SOFT = 1 << 31
+
+
+class Occupancy:
+    # Слой владельцев пикселей экрана: номер примитива, поставившего пиксель, или 0.
+    # Размер равен размеру кадрового буфера и не растёт с числом примитивов;
+    # offset_x, offset_y - сдвиг буфера, как у FrameBuffer
+    def __init__(self, width, height, offset_x=0, offset_y=0):
+        self.width = width
+        self.height = height
+        self.offset_x = offset_x
+        self.offset_y = offset_y
+        self.owners = np.zeros((height, width), dtype=np.uint32)
+
+    def clear(self):
+        self.owners[:] = EMPTY
+
+    def resize(self, width, height):
+        if width == self.width and height == self.height:
+            return
+        owners = np.zeros((height, width), dtype=np.uint32)
+        w = min(width, self.width)
+        h = min(height, self.height)
+        owners[:h, :w] = self.owners[:h, :w]
+        self.owners = owners
+        self.width = width
+        self.height = height
+
+    def _flat(self, points):
+        points = np.asarray(points, dtype=np.int64).reshape(-1, 2)
+        xs = points[:, 0] - self.offset_x
+        ys = points[:, 1] - self.offset_y
+        index = np.nonzero((xs >= 0) & (xs < self.width) & (ys >= 0) & (ys < self.height))[0]
+        return points, index, ys[index] * self.width + xs[index]
+
+    def claim(self, points, owner, soft=False):
+        # Занимает свободные пиксели и возвращает только их: уже занятые
+        # рисовать заново не нужно. owner - номер одного примитива или массив
+        # номеров по точкам; из повторов внутри пакета пиксель достаётся первому
+        points, index, flat = self._flat(points)
+        layer = self.owners.reshape(-1)
+        taken = layer[flat]
+        free = (taken == EMPTY) if soft else (taken == EMPTY) | (taken & SOFT != 0)
+        index, flat = index[free], flat[free]
+        owner = np.broadcast_to(np.asarray(owner, dtype=np.uint32), (len(points),))[index]
+        if soft:
+            owner = owner | SOFT
+        # При повторных индексах побеждает последняя запись, поэтому пишем задом наперёд
+        layer[flat[::-1]] = owner[::-1]
+        return points[index[layer[flat] == owner]]
+
+    def release(self, points, owner):
+        # Освобождает пиксели, которыми владеет owner, и возвращает их
+        points, index, flat = self._flat(points)
+        layer = self.owners.reshape(-1)
+        mine = layer[flat] & ~np.uint32(SOFT) == owner
+        layer[flat[mine]] = EMPTY
+        return points[index[mine]]
+
+    def mask(self, points):
+        # Отметки пикселей точек в массиве размера буфера
+        points, index, flat = self._flat(points)
+        marked = np.zeros(self.width * self.height, dtype=bool)
+        marked[flat] = True
+        return marked.reshape(self.height, self.width)
+
+    def marked(self, points, mask):
+        # Какие из точек попадают в отмеченные пиксели mask
+        points, index, flat = self._flat(points)
+        result = np.zeros(len(points), dtype=bool)
+        result[index] = mask.reshape(-1)[flat]
+        return result
+
+    def owner_at(self, x, y):
+        if 0 <= x < self.width and 0 <= y < self.height:
+            return int(self.owners[y, x]) & ~SOFT
+        return EMPTY
+
+    def pick(self, x, y, radius=0):
+        # Владелец пикселя под курсором; с radius > 0 ищется ближайший занятый
+        # пиксель в квадрате вокруг точки, число проверок не зависит от сцены
+        owner = self.owner_at(x, y)
+        if owner or radius <= 0:
+            return owner
+        x0, y0 = max(x - radius, 0), max(y - radius, 0)
+        window = self.owners[y0:y + radius + 1, x0:x + radius + 1]
+        ys, xs = np.nonzero(window)
+        if len(xs) == 0:
+            return EMPTY
+        nearest = np.argmin((xs + x0 - x) ** 2 + (ys + y0 - y) ** 2)
+        return int(window[ys[nearest], xs[nearest]]) & ~SOFT
@@ -1,14 +1,76 @@
-import time
+import math
+from fractions import Fraction
 
+import Module.clip as clip
+import Module.framebuffer as framebuffer
+import Module.stepper as stepper
 
-def draw_parabola(canvas, vx, vy, a, debug=False):
-    canvas_width = int(canvas.winfo_width())
-    R = canvas_width // 2
-    for x in range(vx - R, vx + R + 1):
-        y = int(round(vy + a * ((x - vx) ** 2)))
-        canvas.create_rectangle(x, y, x + 1, y + 1, fill="black", outline="black")
-        if debug:
-            canvas.update()
-            time.sleep(0.01)
 
+def parabola_points(vx, vy, a, viewport):
+    x_range = clip.mirrored_range(vx, viewport[0], viewport[2])
+    if x_range is None:
+        return
+    x_start, x_end = x_range
+    sy = 1 if a >= 0 else -1
+    # Смещение по y от вершины в сторону раскрытия параболы
+    if sy > 0:
+        y_start, y_end = max(viewport[1] - vy, 0), viewport[3] - 1 - vy
+    else:
+        y_start, y_end = max(vy - viewport[3] + 1, 0), vy - viewport[1]
+    if x_start > x_end or y_start > y_end:
+        return
+
+    # a = p / q, чтобы решающие переменные средней точки оставались целыми
+    k = Fraction(abs(a)).limit_denominator(1 << 16)
+    p, q = k.numerator, k.denominator
+    if p == 0:
+        if y_start == 0:
+            for x in range(x_start, x_end + 1):
+                yield from _reflect(vx, vy, x, 0, viewport)
+        return
+
+    # Начинаем на шаг по малой оси раньше окна: со столбца x_start - 1 или со
+    # столбца, где ветвь ещё ниже строки y_start. Ближайший к ветви пиксель этого
+    # столбца лежит на пути алгоритма средней точки, поэтому дальше путь совпадает
+    # с путём без отсечения, а лишние пиксели отбрасывает проверка на попадание в окно
+    x = max(x_start - 1, math.isqrt(max(y_start - 1, 0) * q // p), 0)
+    y = (2 * p * x * x + q) // (2 * q)
+
+    region1 = 2 * p * x < q
+    d = 2 * p * (x + 1) ** 2 - q * (2 * y + 1)
+    e = p * (2 * x + 1) ** 2 - 4 * q * (y + 1)
+    while x <= x_end and y <= y_end:
+        if y >= y_start:
+            yield from _reflect(vx, vy, x, sy * y, viewport)
+
+        if region1:
+            if d > 0:
+                d -= 2 * q
+                y += 1
+            d += 2 * p * (2 * x + 3)
+            x += 1
+            if 2 * p * x >= q:
+                region1 = False
+                e = p * (2 * x + 1) ** 2 - 4 * q * (y + 1)
+        else:
+            if e < 0:
+                e += p * (8 * x + 8)
+                x += 1
+            e -= 4 * q
+            y += 1
 
+
+def _reflect(vx, vy, x, y, viewport):
+    for px in ((vx + x, vx - x) if x else (vx,)):
+        if clip.inside(px, vy + y, viewport):
+            yield px, vy + y
+
+
+def draw_parabola(canvas, vx, vy, a, debug=False):
+    fb = framebuffer.get_framebuffer(canvas)
+    points = parabola_points(vx, vy, a, fb.viewport())
+    if debug:
+        stepper.animate(canvas, points)
+        return
+    for x, y in points:
+        fb.plot(x, y)
@@ -0,0 +1,18 @@
+import numpy as np
+
+
+def polyline_links(vertices, offsets):
+    # Звенья пакета ломаных: вершины всех ломаных идут подряд, offsets - их границы.
+    # Возвращает отрезки (x0, y0, x1, y1), номер ломаной у каждого звена и признаки
+    # первого и последнего звена ломаной. Ломаная из одной вершины - звено нулевой длины
+    vertices = np.asarray(vertices, dtype=np.float64).reshape(-1, 2)
+    offsets = np.asarray(offsets, dtype=np.int64)
+    counts = np.diff(offsets)
+    path = np.repeat(np.arange(len(counts)), counts)
+    start = np.concatenate([np.nonzero(path[1:] == path[:-1])[0], offsets[:-1][counts == 1]])
+    start.sort()
+    end = np.where(counts[path[start]] == 1, start, start + 1)
+    owners = path[start]
+    first = start == offsets[owners]
+    last = end == offsets[owners + 1] - 1
+    return np.concatenate([vertices[start], vertices[end]], axis=1), owners, first, last
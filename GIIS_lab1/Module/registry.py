@@ -0,0 +1,41 @@
+import importlib
+
+# Алгоритмы редактора. Меню строятся по этим записям, а сами модули
+# импортируются только при первом выборе пункта: mode - режим ввода точек,
+# kind - вид примитива сцены, hint - подсказка в строке состояния
+ALGORITHMS = (
+    {"module": "dda", "mode": "line", "kind": "line", "label": "Алгоритм ЦДА"},
+    {"module": "bresenham", "mode": "line", "kind": "line", "label": "Алгоритм Брезенхэма"},
+    {"module": "wu", "mode": "line", "kind": "line", "label": "Алгоритм Ву"},
+    {"module": "bresenham", "mode": "polyline", "kind": "polyline", "label": "Ломаная (Брезенхэм)",
+     "hint": "Ломаная: отметьте вершины и нажмите Enter"},
+    {"module": "wu", "mode": "polyline", "kind": "polyline", "label": "Ломаная (Ву)",
+     "hint": "Ломаная: отметьте вершины и нажмите Enter"},
+    {"module": "circle", "mode": "curve", "kind": "circle", "label": "Окружность"},
+    {"module": "ellipse", "mode": "curve", "kind": "ellipse", "label": "Эллипс"},
+    {"module": "hyperbola", "mode": "curve", "kind": "hyperbola", "label": "Гипербола"},
+    {"module": "parabola", "mode": "curve", "kind": "parabola", "label": "Парабола"},
+    {"module": "hermit", "mode": "parametric", "kind": "hermite", "label": "Эрмит"},
+    {"module": "bezier", "mode": "parametric", "kind": "bezier", "label": "Безье"},
+    {"module": "b_spline", "mode": "parametric", "kind": "bspline", "label": "B-сплайн",
+     "hint": "B-сплайн: отметьте опорные точки и нажмите Enter. Shift+перетаскивание двигает точку."},
+)
+# Заголовок меню и режимы его пунктов; разные режимы отделяются чертой
+MENUS = (
+    ("Отрезки", ("line", "polyline")),
+    ("Линии второго порядка", ("curve",)),
+    ("Кривые", ("parametric",)),
+)
+
+
+def entries(mode):
+    return [entry for entry in ALGORITHMS if entry["mode"] == mode]
+
+
+def load(name):
+    # Повторный вызов дешёвый: importlib берёт модуль из sys.modules
+    return importlib.import_module("Module." + name)
+
+
+def name_of(module):
+    return module.__name__.rsplit(".", 1)[-1]
@@ -0,0 +1,322 @@
+import itertools
+
+import numpy as np
+
+import Module.clip as clip
+import Module.curve as curve
+import Module.framebuffer as framebuffer
+import Module.occupancy as occupancy
+import Module.stepper as stepper
+
+# Примитивы, у которых есть пакетная растеризация
+BATCHED = ("line", "polyline", "circle", "ellipse", "hermite", "bezier")
+
+
+def antialiased(algorithm):
+    # Сглаживающий алгоритм выдаёт покрытие (x, y, alpha) вместо сплошных пикселей.
+    # Модули алгоритмов сцена не импортирует: они приходят вместе с примитивами
+    return getattr(algorithm, "ANTIALIASED", False)
+
+
+class Scene:
+    # Список нарисованных примитивов в логических координатах.
+    # Вид задаётся масштабом и логической точкой в левом верхнем углу холста;
+    # при смене вида видимые примитивы заново растеризуются в экранных пикселях
+    def __init__(self, canvas):
+        self.canvas = canvas
+        self.scale = 1.0
+        self.origin_x = 0.0
+        self.origin_y = 0.0
+        self.primitives = []
+        self.by_id = {}
+        self.ids = itertools.count(1)
+        fb = framebuffer.get_framebuffer(canvas)
+        # Кто владеет каждым пикселем экрана: повторно занятые пиксели не рисуются,
+        # а выбор примитива под курсором - одно чтение из массива
+        self.occupancy = occupancy.Occupancy(fb.width, fb.height, fb.offset_x, fb.offset_y)
+
+    def to_logical(self, x, y):
+        return self.origin_x + x / self.scale, self.origin_y + y / self.scale
+
+    def to_device(self, x, y):
+        return (int(round((x - self.origin_x) * self.scale)),
+                int(round((y - self.origin_y) * self.scale)))
+
+    def _vector(self, v):
+        return v[0] * self.scale, v[1] * self.scale
+
+    def add(self, kind, algorithm, params, debug=False, trace=None, draw=True):
+        primitive = {"id": next(self.ids), "kind": kind, "algorithm": algorithm, "params": params,
+                     "spline": None}
+        self.primitives.append(primitive)
+        self.by_id[primitive["id"]] = primitive
+        if not draw:
+            # Например, при загрузке файла: сцена потом перерисовывается целиком
+            return primitive
+        self._sync_size()
+        if debug:
+            # Пиксели занимаются сразу, а показываются по шагу.
+            # Отмена анимации убирает недорисованный примитив со сцены
+            steps = list(self._steps(primitive, trace))
+            soft = bool(steps) and len(steps[0]) == 3
+            self.occupancy.claim([step[:2] for step in steps], primitive["id"], soft)
+            stepper.animate(self.canvas, steps, lambda: self.remove(primitive))
+        elif trace is not None or kind not in BATCHED:
+            # Запись трассы идёт только по пошаговым генераторам алгоритмов
+            self._draw_steps(primitive, list(self._steps(primitive, trace)))
+        else:
+            # Тем же пакетным путём, что и при перерисовке, чтобы пиксели не менялись
+            self._draw_batch(kind, algorithm, [primitive])
+        return primitive
+
+    def clear(self):
+        self.primitives = []
+        self.by_id = {}
+        self.ids = itertools.count(1)
+        self.scale = 1.0
+        self.origin_x = 0.0
+        self.origin_y = 0.0
+        self.redraw()
+
+    def remove(self, primitive):
+        self.primitives.remove(primitive)
+        del self.by_id[primitive["id"]]
+        self.redraw()
+
+    def pick(self, x, y, radius=2):
+        return self.by_id.get(self.occupancy.pick(x, y, radius))
+
+    def _sync_size(self):
+        fb = framebuffer.get_framebuffer(self.canvas)
+        self.occupancy.resize(fb.width, fb.height)
+
+    def _device_params(self, primitive):
+        p = primitive["params"]
+        kind = primitive["kind"]
+        if kind == "line":
+            return self.to_device(p[0], p[1]) + self.to_device(p[2], p[3])
+        if kind == "circle":
+            return self.to_device(p[0], p[1]) + (int(round(p[2] * self.scale)),)
+        if kind in ("ellipse", "hyperbola"):
+            return self.to_device(p[0], p[1]) + (int(round(p[2] * self.scale)), int(round(p[3] * self.scale)))
+        if kind == "parabola":
+            # y = a x^2 в логических координатах переходит в y = (a / scale) x^2 на экране
+            return self.to_device(p[0], p[1]) + (p[2] / self.scale,)
+        if kind == "hermite":
+            # Касательные - векторы, их только масштабируем
+            return (self.to_device(*p[0]), self.to_device(*p[1]), self._vector(p[2]), self._vector(p[3]))
+        return tuple(self.to_device(*point) for point in p)
+
+    def _bounds(self, primitive, params):
+        # Габариты примитивов без пакетной растеризации, у пакетных - _device_batch
+        if primitive["kind"] != "bspline":
+            # Гипербола и парабола не ограничены, их отсекает сам растеризатор
+            return None
+        xs, ys = [q[0] for q in params], [q[1] for q in params]
+        return min(xs) - 1, min(ys) - 1, max(xs) + 1, max(ys) + 1
+
+    def _device_batch(self, kind, primitives):
+        # То же, что _device_params и _bounds, но сразу для пакета однотипных
+        # примитивов: параметры массивом (n, ...) и габариты массивом (n, 4)
+        origin = np.array([self.origin_x, self.origin_y])
+        if kind == "polyline":
+            # У ломаных разное число вершин, поэтому массив вершин у каждой свой
+            items = np.empty(len(primitives), dtype=object)
+            bounds = np.empty((len(primitives), 4))
+            for i, primitive in enumerate(primitives):
+                items[i] = np.rint((np.asarray(primitive["params"], dtype=np.float64) - origin) * self.scale)
+                bounds[i] = np.concatenate([items[i].min(axis=0) - 1, items[i].max(axis=0) + 1])
+            return items, bounds
+        params = np.array([primitive["params"] for primitive in primitives], dtype=np.float64)
+        if kind in ("circle", "ellipse"):
+            centers = np.rint((params[:, :2] - origin) * self.scale)
+            radii = np.rint(params[:, 2:] * self.scale)
+            return np.hstack([centers, radii]), np.hstack([centers - radii, centers + radii])
+        if kind == "line":
+            hull = np.rint((params.reshape(-1, 2, 2) - origin) * self.scale)
+            items = hull.reshape(-1, 4)
+        elif kind == "hermite":
+            items = np.concatenate([np.rint((params[:, :2] - origin) * self.scale), params[:, 2:] * self.scale], axis=1)
+            hull = np.stack([items[:, 0], items[:, 0] + items[:, 2] / 3.0,
+                             items[:, 1] - items[:, 3] / 3.0, items[:, 1]], axis=1)
+        else:
+            items = np.rint((params - origin) * self.scale)
+            hull = items
+        bounds = np.hstack([hull.min(axis=1) - 1, hull.max(axis=1) + 1])
+        return items, bounds
+
+    def device_bounds(self):
+        # Экранные габариты всех примитивов в порядке сцены, массив (n, 4);
+        # у гиперболы и параболы габаритов нет, они занимают всю плоскость
+        bounds = np.empty((len(self.primitives), 4))
+        bounds[:] = (-np.inf, -np.inf, np.inf, np.inf)
+        batches = {}
+        for i, primitive in enumerate(self.primitives):
+            if primitive["kind"] in BATCHED:
+                batches.setdefault(primitive["kind"], []).append(i)
+                continue
+            box = self._bounds(primitive, self._device_params(primitive))
+            if box is not None:
+                bounds[i] = box
+        for kind, index in batches.items():
+            bounds[index] = self._device_batch(kind, [self.primitives[i] for i in index])[1]
+        return bounds
+
+    def _draw_steps(self, primitive, steps, pixels=None):
+        fb = framebuffer.get_framebuffer(self.canvas)
+        if not steps:
+            return
+        steps = np.array(steps)
+        if pixels is not None:
+            steps = steps[self.occupancy.marked(steps[:, :2], pixels)]
+        if steps.shape[1] == 3:
+            # Сглаженные пиксели смешиваются все, иначе пропадёт часть покрытия
+            self.occupancy.claim(steps[:, :2], primitive["id"], soft=True)
+            fb.blend_points(steps[:, :2], steps[:, 2])
+        else:
+            fb.plot_points(self.occupancy.claim(steps, primitive["id"]))
+
+    def _steps(self, primitive, trace=None):
+        # Пиксели примитива по одному, для пошаговой отрисовки; трассу пишут
+        # отрезки, окружность и эллипс
+        params = self._device_params(primitive)
+        viewport = framebuffer.get_framebuffer(self.canvas).viewport()
+        kind = primitive["kind"]
+        algorithm = primitive["algorithm"]
+        if kind == "line":
+            if antialiased(algorithm):
+                return algorithm.line_coverage(*params, viewport, trace)
+            return algorithm.line_points(*params, viewport, trace)
+        if kind == "polyline":
+            if antialiased(algorithm):
+                points, alpha = algorithm.polyline_coverage(params, viewport)
+                return zip(points[:, 0].tolist(), points[:, 1].tolist(), alpha.tolist())
+            return algorithm.polyline_points(params, viewport)
+        if kind == "circle":
+            return algorithm.circle_points(*params, viewport, trace)
+        if kind == "ellipse":
+            return algorithm.ellipse_points(*params, viewport, trace)
+        if kind == "hyperbola":
+            return algorithm.hyperbola_points(*params, viewport)
+        if kind == "parabola":
+            return algorithm.parabola_points(*params, viewport)
+        if kind == "hermite":
+            return algorithm.hermite_points(*params, viewport=viewport)
+        if kind == "bezier":
+            return algorithm.bezier_points(*params, viewport=viewport)
+        primitive["spline"] = algorithm.BSplineCurve(params, viewport=viewport)
+        return primitive["spline"].points()
+
+    def redraw(self):
+        # Перерисовка рисует всё целиком, незаконченные анимации больше не нужны
+        stepper.get_scheduler(self.canvas).clear()
+        fb = framebuffer.get_framebuffer(self.canvas)
+        fb.clear()
+        self._sync_size()
+        self.occupancy.clear()
+        self._draw(self.primitives)
+
+    def _draw(self, primitives, pixels=None):
+        # pixels - маска экранных пикселей: если задана, рисуются только они
+        viewport = framebuffer.get_framebuffer(self.canvas).viewport()
+        # Однотипные примитивы собираются в пакеты и рисуются одним вызовом,
+        # невидимые отсекаются уже внутри пакета
+        batches = {}
+        for primitive in primitives:
+            if primitive["kind"] in BATCHED:
+                batches.setdefault((primitive["kind"], primitive["algorithm"]), []).append(primitive)
+                continue
+            params = self._device_params(primitive)
+            bounds = self._bounds(primitive, params)
+            if bounds is not None and not clip.box_visible(*bounds, viewport):
+                primitive["spline"] = None
+                continue
+            self._draw_steps(primitive, list(self._steps(primitive)), pixels)
+
+        for (kind, algorithm), batch in batches.items():
+            self._draw_batch(kind, algorithm, batch, pixels)
+
+    def _draw_batch(self, kind, algorithm, primitives, pixels=None):
+        fb = framebuffer.get_framebuffer(self.canvas)
+        viewport = fb.viewport()
+        items, bounds = self._device_batch(kind, primitives)
+        visible = clip.box_visible_mask(*bounds.T, viewport)
+        if not visible.all():
+            primitives = [primitive for primitive, v in zip(primitives, visible) if v]
+            items = items[visible]
+        if not primitives:
+            return
+        if kind == "line" and antialiased(algorithm):
+            points, alpha, offsets = algorithm.line_coverage_batch(items, viewport)
+        elif kind == "polyline":
+            # Все ломаные пакета - одним вызовом, стыки внутри каждой рисуются один раз
+            offsets = np.zeros(len(items) + 1, dtype=np.int64)
+            np.cumsum([len(vertices) for vertices in items], out=offsets[1:])
+            vertices = np.concatenate(list(items))
+            if antialiased(algorithm):
+                points, alpha, offsets = algorithm.polyline_coverage_batch(vertices, offsets, viewport)
+            else:
+                points, offsets = algorithm.polyline_points_batch(vertices, offsets, viewport)
+        elif kind == "line":
+            points, offsets = algorithm.line_points_batch(items, viewport)
+        elif kind == "circle":
+            points, offsets = algorithm.circle_points_batch(items[:, :2], items[:, 2], viewport)
+        elif kind == "ellipse":
+            points, offsets = algorithm.ellipse_points_batch(items[:, :2], items[:, 2], items[:, 3], viewport)
+        else:
+            points, offsets = curve.curve_points_batch(kind, items, viewport=viewport)
+        owners = np.repeat([primitive["id"] for primitive in primitives], np.diff(offsets))
+        if pixels is not None:
+            keep = self.occupancy.marked(points, pixels)
+            points, owners = points[keep], owners[keep]
+            if antialiased(algorithm):
+                alpha = alpha[keep]
+        if antialiased(algorithm):
+            self.occupancy.claim(points, owners, soft=True)
+            fb.blend_points(points, alpha)
+        else:
+            fb.plot_points(self.occupancy.claim(points, owners))
+
+    def zoom(self, factor, pivot_x=0, pivot_y=0):
+        # Точка холста под pivot остаётся на месте
+        x, y = self.to_logical(pivot_x, pivot_y)
+        self.scale *= factor
+        self.origin_x = x - pivot_x / self.scale
+        self.origin_y = y - pivot_y / self.scale
+        self.redraw()
+
+    def pan(self, dx, dy):
+        self.origin_x -= dx / self.scale
+        self.origin_y -= dy / self.scale
+        self.redraw()
+
+    def nearest_spline_point(self, x, y, radius=8):
+        for primitive in reversed(self.primitives):
+            if primitive["spline"] is not None:
+                index = primitive["spline"].nearest_point(x, y, radius)
+                if index is not None:
+                    return primitive, index
+        return None, None
+
+    def move_spline_point(self, primitive, index, x, y):
+        params = list(primitive["params"])
+        params[index] = self.to_logical(x, y)
+        primitive["params"] = tuple(params)
+        old, new = primitive["spline"].move_point(index, (x, y))
+        # Стираются только пиксели, которыми владел сам сплайн
+        fb = framebuffer.get_framebuffer(self.canvas)
+        released = self.occupancy.release(old, primitive["id"])
+        fb.plot_points(released, fb.background)
+        self._repaint(released, primitive)
+        fb.plot_points(self.occupancy.claim(new, primitive["id"]))
+
+    def _repaint(self, points, skip):
+        # Освобождённые пиксели могут лежать и на других примитивах: у пикселя
+        # один владелец, поэтому их пиксели там не рисовались. Примитивы, чьи
+        # габариты задевают эти пиксели, растеризуются заново, но только в них
+        if len(points) == 0:
+            return
+        box = (points[:, 0].min(), points[:, 1].min(), points[:, 0].max() + 1, points[:, 1].max() + 1)
+        touching = clip.box_visible_mask(*self.device_bounds().T, box)
+        primitives = [p for p, t in zip(self.primitives, touching) if t and p is not skip]
+        self._draw(primitives, self.occupancy.mask(points))
@@ -0,0 +1,97 @@
+import gc
+import os
+
+import numpy as np
+
+import Module.registry as registry
+
+MAGIC = b"GIIS-SCENE 1\n"
+# Номера в файле - индексы в этих кортежах, новые значения дописываются только в конец
+KINDS = ("line", "circle", "ellipse", "hyperbola", "parabola", "hermite", "bezier", "bspline", "polyline")
+ALGORITHMS = ("dda", "bresenham", "wu", "circle", "ellipse", "hyperbola", "parabola", "hermit", "bezier", "b_spline")
+# У кривых параметры - точки (x, y), в файле они лежат подряд
+POINT_KINDS = ("hermite", "bezier", "bspline", "polyline")
+CHUNK = 65536
+
+
+def encode(primitives):
+    kinds = np.array([KINDS.index(p["kind"]) for p in primitives], dtype=np.uint8)
+    algorithms = np.array([ALGORITHMS.index(registry.name_of(p["algorithm"])) for p in primitives], dtype=np.uint8)
+    values, sizes = [], []
+    for p in primitives:
+        params = p["params"]
+        if p["kind"] in POINT_KINDS:
+            params = [v for point in params for v in point]
+        values.extend(params)
+        sizes.append(len(params))
+    return kinds, algorithms, np.array(sizes, dtype=np.uint32), np.array(values, dtype=np.float64)
+
+
+def decode(kinds, algorithms, sizes, values):
+    # Примитивы одного типа с одинаковым числом параметров разбираются одной
+    # выборкой из массива, без цикла по отдельным числам
+    sizes = sizes.astype(np.int64)
+    starts = np.cumsum(sizes) - sizes
+    params = [None] * len(kinds)
+    for kind in np.unique(kinds):
+        of_kind = kinds == kind
+        for size in np.unique(sizes[of_kind]):
+            index = np.nonzero(of_kind & (sizes == size))[0]
+            rows = values[starts[index, None] + np.arange(size)]
+            if KINDS[kind] in POINT_KINDS:
+                rows = [tuple(map(tuple, row)) for row in rows.reshape(len(index), -1, 2).tolist()]
+            else:
+                rows = list(map(tuple, rows.tolist()))
+            for i, row in zip(index.tolist(), rows):
+                params[i] = row
+    # Загружаются только модули алгоритмов, которые есть в файле
+    modules = {a: registry.load(ALGORITHMS[a]) for a in np.unique(algorithms).tolist()}
+    for kind, algorithm, row in zip(kinds.tolist(), algorithms.tolist(), params):
+        yield KINDS[kind], modules[algorithm], row
+
+
+def save(scene, path):
+    # Заголовок с видом, затем куски по CHUNK примитивов: четыре столбца в формате .npy
+    # (тип, алгоритм, число параметров, все параметры подряд)
+    with open(path, "wb") as f:
+        f.write(MAGIC)
+        f.write(f"{scene.scale!r} {scene.origin_x!r} {scene.origin_y!r} {len(scene.primitives)}\n".encode())
+        for start in range(0, len(scene.primitives), CHUNK):
+            for column in encode(scene.primitives[start:start + CHUNK]):
+                np.save(f, column, allow_pickle=False)
+
+
+def read(path):
+    # Читает файл по кускам; возвращает вид и генератор примитивов (kind, algorithm, params)
+    f = open(path, "rb")
+    if f.readline() != MAGIC:
+        f.close()
+        raise ValueError(f"{path}: это не файл сцены")
+    scale, origin_x, origin_y, count = f.readline().split()
+    size = os.fstat(f.fileno()).st_size
+
+    def primitives():
+        with f:
+            while f.tell() < size:
+                columns = [np.load(f, allow_pickle=False) for _ in range(4)]
+                yield from decode(*columns)
+    return (float(scale), float(origin_x), float(origin_y)), primitives()
+
+
+def load(scene, path, redraw=True):
+    # Примитивы добавляются без отрисовки, затем вся сцена растеризуется пакетами
+    view, primitives = read(path)
+    scene.clear()
+    # Сотни тысяч мелких кортежей раз за разом запускают сборщик мусора,
+    # хотя циклических ссылок среди них нет
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        for kind, algorithm, params in primitives:
+            scene.add(kind, algorithm, params, draw=False)
+    finally:
+        if enabled:
+            gc.enable()
+    scene.scale, scene.origin_x, scene.origin_y = view
+    if redraw:
+        scene.redraw()
@@ -0,0 +1,134 @@
+from collections import deque
+
+import numpy as np
+
+import Module.framebuffer as framebuffer
+
+DELAY = 20
+MAX_DELAY = 1000
+
+
+class StepScheduler:
+    # Пошаговая отрисовка для отладочного режима. Шаг - пиксель (x, y)
+    # или (x, y, alpha) для сглаженных линий. Шаги берутся из генераторов
+    # алгоритмов по таймеру canvas.after, поэтому главный цикл Tk не блокируется
+    def __init__(self, canvas, delay=DELAY):
+        self.canvas = canvas
+        self.delay = delay
+        self.batch = 1
+        self.paused = False
+        self.queue = deque()
+        self.job = None
+
+    def add(self, steps, on_cancel=None):
+        self.queue.append((iter(steps), on_cancel))
+        self._schedule()
+
+    def busy(self):
+        return bool(self.queue)
+
+    def _schedule(self):
+        if self.job is None and not self.paused and self.queue:
+            self.job = self.canvas.after(self.delay, self._tick)
+
+    def _unschedule(self):
+        if self.job is not None:
+            self.canvas.after_cancel(self.job)
+            self.job = None
+
+    def _tick(self):
+        self.job = None
+        self._advance(self.batch)
+        self._schedule()
+
+    def _advance(self, count):
+        # Возвращает, сколько шагов не хватило: больше нуля, только если очередь кончилась
+        fb = framebuffer.get_framebuffer(self.canvas)
+        while count > 0 and self.queue:
+            step = next(self.queue[0][0], None)
+            if step is None:
+                self.queue.popleft()
+                continue
+            if len(step) == 3:
+                fb.blend(*step)
+            else:
+                fb.plot(*step)
+            count -= 1
+        return count
+
+    def faster(self):
+        if self.delay > 1:
+            self.delay = max(self.delay // 2, 1)
+        else:
+            self.batch *= 2
+
+    def slower(self):
+        if self.batch > 1:
+            self.batch //= 2
+        else:
+            self.delay = min(self.delay * 2, MAX_DELAY)
+
+    def pause(self):
+        self.paused = True
+        self._unschedule()
+
+    def resume(self):
+        self.paused = False
+        self._schedule()
+
+    def toggle_pause(self):
+        if self.paused:
+            self.resume()
+        else:
+            self.pause()
+
+    def step(self):
+        # Один шаг вручную; очередь остаётся на паузе. Если шагать нечего,
+        # пауза снимается, иначе следующая анимация так и не начнётся
+        self.pause()
+        if self._advance(1):
+            self.resume()
+
+    def cancel(self):
+        # Прерывает текущую анимацию
+        if not self.queue:
+            return
+        _, on_cancel = self.queue.popleft()
+        if on_cancel is not None:
+            on_cancel()
+
+    def clear(self):
+        # Сбрасывает очередь без обратных вызовов
+        self._unschedule()
+        self.queue.clear()
+
+    def finish(self):
+        # Оставшиеся шаги всех анимаций рисуются сразу, пакетно
+        self._unschedule()
+        while self.queue:
+            steps, _ = self.queue.popleft()
+            draw_steps(self.canvas, steps)
+
+
+def draw_steps(canvas, steps):
+    fb = framebuffer.get_framebuffer(canvas)
+    pixels, blended = [], []
+    for step in steps:
+        (blended if len(step) == 3 else pixels).append(step)
+    if pixels:
+        fb.plot_points(pixels)
+    if blended:
+        blended = np.array(blended)
+        fb.blend_points(blended[:, :2], blended[:, 2])
+
+
+def get_scheduler(canvas):
+    scheduler = getattr(canvas, "stepper", None)
+    if scheduler is None:
+        scheduler = StepScheduler(canvas)
+        canvas.stepper = scheduler
+    return scheduler
+
+
+def animate(canvas, steps, on_cancel=None):
+    get_scheduler(canvas).add(steps, on_cancel)
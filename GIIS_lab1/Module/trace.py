@@ -0,0 +1,86 @@
+from array import array
+
+import numpy as np
+
+import Module.stepper as stepper
+
+MAGIC = b"GIIS-TRACE 1\n"
+
+
+class Trace:
+    # Запись решающих переменных алгоритма: одна строка на выданный пиксель,
+    # первые столбцы всегда x и y. Значения хранятся подряд в array.array,
+    # без объекта на строку. Алгоритм сам задаёт столбцы вызовом begin
+    def __init__(self, fields=None, typecode="q"):
+        self.fields = tuple(fields) if fields else None
+        self.data = array(typecode)
+
+    def begin(self, fields, typecode="q"):
+        fields = tuple(fields)
+        if self.fields is None:
+            self.fields = fields
+            self.data = array(typecode)
+        elif self.fields != fields:
+            raise ValueError(f"Трасса уже записывает {self.fields}, а не {fields}")
+        elif self.data.typecode != typecode and typecode == "d":
+            # Целые значения без потерь переводятся в вещественные
+            self.data = array("d", self.data)
+        return self
+
+    def append(self, *values):
+        self.data.extend(values)
+
+    def __len__(self):
+        return len(self.data) // len(self.fields) if self.fields else 0
+
+    def to_array(self):
+        if not self.fields:
+            return np.zeros((0, 0))
+        return np.frombuffer(self.data, dtype=self.data.typecode).reshape(-1, len(self.fields))
+
+    def column(self, name):
+        return self.to_array()[:, self.fields.index(name)]
+
+    def steps(self):
+        # Пиксели трассы в виде шагов планировщика; у Ву ещё и альфа
+        rows = self.to_array()
+        if "alpha" in self.fields:
+            a = self.fields.index("alpha")
+            for row in rows:
+                yield int(row[0]), int(row[1]), int(row[a])
+        else:
+            for row in rows:
+                yield int(row[0]), int(row[1])
+
+    def save(self, path):
+        if str(path).endswith(".csv"):
+            np.savetxt(path, self.to_array(), delimiter=",", header=",".join(self.fields),
+                       comments="", fmt="%d" if self.data.typecode == "q" else "%.17g")
+            return
+        with open(path, "wb") as f:
+            f.write(MAGIC)
+            f.write((self.data.typecode + " " + ",".join(self.fields) + "\n").encode())
+            self.data.tofile(f)
+
+
+def load(path):
+    if str(path).endswith(".csv"):
+        with open(path) as f:
+            fields = f.readline().strip().split(",")
+        rows = np.loadtxt(path, delimiter=",", skiprows=1, ndmin=2)
+        typecode = "q" if np.all(rows == np.round(rows)) else "d"
+        trace = Trace(fields, typecode)
+        trace.data.extend(rows.astype(np.int64 if typecode == "q" else np.float64).ravel().tolist())
+        return trace
+    with open(path, "rb") as f:
+        if f.readline() != MAGIC:
+            raise ValueError(f"{path}: это не файл трассы")
+        typecode, fields = f.readline().decode().strip().split(" ", 1)
+        trace = Trace(fields.split(","), typecode)
+        trace.data.frombytes(f.read())
+    return trace
+
+
+def replay(canvas, trace):
+    # Повтор без пересчёта алгоритма; скоростью управляет планировщик шагов
+    stepper.animate(canvas, trace.steps())
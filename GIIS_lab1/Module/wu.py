@@ -1,28 +1,42 @@
 import math
-import time
 
+import numpy as np
 
-def _ipart(x):
-    return math.floor(x)
-def _round(x):
-    return _ipart(x + 0.5)
-def _fpart(x):
-    return x - math.floor(x)
-def _rfpart(x):
-    return 1 - _fpart(x)
+import Module.clip as clip
+import Module.framebuffer as framebuffer
+import Module.raster as raster
+import Module.stepper as stepper
 
-def _plot(canvas, x, y, intensity, debug=False):
-    intensity = max(0, min(1, intensity))
-    gray_value = int((1 - intensity) * 255)
-    color = f"#{gray_value:02x}{gray_value:02x}{gray_value:02x}"
-    canvas.create_rectangle(x, y, x + 1, y + 1, fill=color, outline=color)
+# Алгоритм выдаёт покрытие (x, y, alpha), сцена смешивает его с фоном
+ANTIALIASED = True
+FRAC_BITS = 16
+ONE = 1 << FRAC_BITS
+HALF = ONE >> 1
+MASK = ONE - 1
 
-    if debug:
-        canvas.update()
-        time.sleep(0.05)
 
+def _to_fixed(v):
+    return int(round(v * ONE))
 
-def draw_line(canvas, x0, y0, x1, y1, debug=False):
+
+def _alpha(frac):
+    return (frac * 255) >> FRAC_BITS
+
+
+def _major_box(viewport, steep):
+    # Окно в координатах (ведущая, ведомая ось) с запасом: пиксели пары лежат
+    # в пределах пикселя от прямой, а фиксированный градиент отстаёт ещё меньше
+    if steep:
+        return viewport[1] - 1, viewport[0] - 2, viewport[3], viewport[2] + 1
+    return viewport[0] - 1, viewport[1] - 2, viewport[2], viewport[3] + 1
+
+
+def line_coverage(x0, y0, x1, y1, viewport=None, trace=None):
+    # Тот же алгоритм Ву в фиксированной точке 16.16: координаты, градиент и intery
+    # целые, покрытие отдаётся как альфа 0..255
+    if trace is not None:
+        trace.begin(("x", "y", "alpha", "intery"))
+    x0, y0, x1, y1 = _to_fixed(x0), _to_fixed(y0), _to_fixed(x1), _to_fixed(y1)
     steep = abs(y1 - y0) > abs(x1 - x0)
 
     if steep:
@@ -35,47 +49,181 @@ def draw_line(canvas, x0, y0, x1, y1, debug=False):
 
     dx = x1 - x0
     dy = y1 - y0
-    gradient = dy / dx if dx != 0 else 1.0
+    gradient = (dy << FRAC_BITS) // dx if dx != 0 else ONE
 
-    xend = _round(x0)
-    yend = y0 + gradient * (xend - x0)
-    xgap = _rfpart(x0 + 0.5)
-    xpixel1 = xend
-    ypixel1 = _ipart(yend)
-
-    if steep:
-        _plot(canvas, ypixel1, xpixel1, _rfpart(yend) * xgap, debug)
-        _plot(canvas, ypixel1 + 1, xpixel1, _fpart(yend) * xgap, debug)
-    else:
-        _plot(canvas, xpixel1, ypixel1, _rfpart(yend) * xgap, debug)
-        _plot(canvas, xpixel1, ypixel1 + 1, _fpart(yend) * xgap, debug)
+    xpixel1 = (x0 + HALF) >> FRAC_BITS
+    yend = y0 + ((gradient * ((xpixel1 << FRAC_BITS) - x0)) >> FRAC_BITS)
+    xgap = ONE - ((x0 + HALF) & MASK)
+    ypixel1 = yend >> FRAC_BITS
+    frac = yend & MASK
+    ends = [(xpixel1, ypixel1, ((ONE - frac) * xgap) >> FRAC_BITS, yend),
+            (xpixel1, ypixel1 + 1, (frac * xgap) >> FRAC_BITS, yend)]
 
     intery = yend + gradient
-    xend = _round(x1)
-    yend = y1 + gradient * (xend - x1)
-    xgap = _fpart(x1 + 0.5)
-    xpixel2 = xend
-    ypixel2 = _ipart(yend)
-
-    if steep:
-        _plot(canvas, ypixel2, xpixel2, _rfpart(yend) * xgap, debug)
-        _plot(canvas, ypixel2 + 1, xpixel2, _fpart(yend) * xgap, debug)
-    else:
-        _plot(canvas, xpixel2, ypixel2, _rfpart(yend) * xgap, debug)
-        _plot(canvas, xpixel2, ypixel2 + 1, _fpart(yend) * xgap, debug)
+    xpixel2 = (x1 + HALF) >> FRAC_BITS
+    yend = y1 + ((gradient * ((xpixel2 << FRAC_BITS) - x1)) >> FRAC_BITS)
+    xgap = (x1 + HALF) & MASK
+    ypixel2 = yend >> FRAC_BITS
+    frac = yend & MASK
+    ends.append((xpixel2, ypixel2, ((ONE - frac) * xgap) >> FRAC_BITS, yend))
+    ends.append((xpixel2, ypixel2 + 1, (frac * xgap) >> FRAC_BITS, yend))
+
+    for x, y, cover, inter in ends:
+        a = _alpha(cover)
+        if a:
+            p = (y, x) if steep else (x, y)
+            if trace is not None:
+                trace.append(p[0], p[1], a, inter)
+            if viewport is None or clip.inside(p[0], p[1], viewport):
+                yield p[0], p[1], a
+
+    first, last = xpixel1 + 1, xpixel2 - 1
+    if viewport is not None:
+        t = clip.liang_barsky(x0 / ONE, y0 / ONE, x1 / ONE, y1 / ONE, _major_box(viewport, steep))
+        if t is None:
+            return
+        first = max(first, math.floor((x0 + t[0] * dx) / ONE))
+        last = min(last, math.ceil((x0 + t[1] * dx) / ONE))
+        intery += gradient * (first - xpixel1 - 1)
+
+    for x in range(first, last + 1):
+        y = intery >> FRAC_BITS
+        frac = intery & MASK
+        for y, a in ((y, _alpha(ONE - frac)), (y + 1, _alpha(frac))):
+            if a:
+                p = (y, x) if steep else (x, y)
+                if trace is not None:
+                    trace.append(p[0], p[1], a, intery)
+                if viewport is None or clip.inside(p[0], p[1], viewport):
+                    yield p[0], p[1], a
+        intery += gradient
+
+
+def line_coverage_batch(segments, viewport=None, full_start=None, skip_end=None):
+    # full_start, skip_end - признаки звеньев ломаной: столбец общей вершины целиком
+    # рисует звено, которое из неё выходит, а входящее звено его пропускает
+    segments = np.rint(np.asarray(segments, dtype=np.float64).reshape(-1, 4) * ONE).astype(np.int64)
+    x0, y0, x1, y1 = segments.T
+    steep = np.abs(y1 - y0) > np.abs(x1 - x0)
+    x0, y0 = np.where(steep, y0, x0), np.where(steep, x0, y0)
+    x1, y1 = np.where(steep, y1, x1), np.where(steep, x1, y1)
+    swap = x0 > x1
+    x0, x1 = np.where(swap, x1, x0), np.where(swap, x0, x1)
+    y0, y1 = np.where(swap, y1, y0), np.where(swap, y0, y1)
 
-    if steep:
-        for x in range(xpixel1 + 1, xpixel2):
-            y = _ipart(intery)
-            _plot(canvas, y, x, _rfpart(intery), debug)
-            _plot(canvas, y + 1, x, _fpart(intery), debug)
-            intery += gradient
-    else:
-        for x in range(xpixel1 + 1, xpixel2):
-            y = _ipart(intery)
-            _plot(canvas, x, y, _rfpart(intery), debug)
-            _plot(canvas, x, y + 1, _fpart(intery), debug)
-            intery += gradient
+    dx = x1 - x0
+    dy = y1 - y0
+    gradient = np.where(dx != 0, (dy << FRAC_BITS) // np.where(dx != 0, dx, 1), ONE)
+
+    xpixel1 = (x0 + HALF) >> FRAC_BITS
+    yend1 = y0 + ((gradient * ((xpixel1 << FRAC_BITS) - x0)) >> FRAC_BITS)
+    xgap1 = ONE - ((x0 + HALF) & MASK)
+    xpixel2 = (x1 + HALF) >> FRAC_BITS
+    yend2 = y1 + ((gradient * ((xpixel2 << FRAC_BITS) - x1)) >> FRAC_BITS)
+    xgap2 = (x1 + HALF) & MASK
+    if full_start is not None:
+        # После перестановки концов начало звена может оказаться справа
+        full_start = np.asarray(full_start, dtype=bool)
+        skip_end = np.asarray(skip_end, dtype=bool)
+        xgap1 = np.where(swap, np.where(skip_end, 0, xgap1), np.where(full_start, ONE, xgap1))
+        xgap2 = np.where(swap, np.where(full_start, ONE, xgap2), np.where(skip_end, 0, xgap2))
+
+    frac1 = yend1 & MASK
+    frac2 = yend2 & MASK
+    end_x = np.concatenate([xpixel1, xpixel1, xpixel2, xpixel2])
+    end_y = np.concatenate([yend1 >> FRAC_BITS, (yend1 >> FRAC_BITS) + 1,
+                            yend2 >> FRAC_BITS, (yend2 >> FRAC_BITS) + 1])
+    end_cover = np.concatenate([((ONE - frac1) * xgap1) >> FRAC_BITS, (frac1 * xgap1) >> FRAC_BITS,
+                                ((ONE - frac2) * xgap2) >> FRAC_BITS, (frac2 * xgap2) >> FRAC_BITS])
+    end_steep = np.tile(steep, 4)
+
+    first = xpixel1 + 1
+    last = xpixel2 - 1
+    if viewport is not None:
+        box = tuple(np.where(steep, a, b) for a, b in zip(_major_box(viewport, True), _major_box(viewport, False)))
+        t0, t1, visible = clip.liang_barsky_batch(np.stack([x0, y0, x1, y1], axis=1) / ONE, box)
+        first = np.maximum(first, np.floor((x0 + t0 * dx) / ONE).astype(np.int64))
+        last = np.where(visible, np.minimum(last, np.ceil((x0 + t1 * dx) / ONE).astype(np.int64)), first - 1)
+    counts = np.maximum(last - first + 1, 0)
+    seg = np.repeat(np.arange(len(segments)), counts)
+    k = np.arange(int(counts.sum())) - np.repeat(np.cumsum(counts) - counts, counts) + (first - xpixel1)[seg]
+    intery = yend1[seg] + gradient[seg] * k
+    mid_x = xpixel1[seg] + k
+    mid_y = intery >> FRAC_BITS
+    frac = intery & MASK
+
+    xs = np.concatenate([end_x, mid_x, mid_x])
+    ys = np.concatenate([end_y, mid_y, mid_y + 1])
+    cover = np.concatenate([end_cover, ONE - frac, frac])
+    is_steep = np.concatenate([end_steep, steep[seg], steep[seg]])
+    owner = np.concatenate([np.tile(np.arange(len(segments)), 4), seg, seg])
+
+    points = np.empty((len(xs), 2), dtype=np.int64)
+    points[:, 0] = np.where(is_steep, ys, xs)
+    points[:, 1] = np.where(is_steep, xs, ys)
+    alpha = (cover * 255) >> FRAC_BITS
+    keep = alpha > 0
+    if viewport is not None:
+        keep &= clip.inside_mask(points, viewport)
+    # Пиксели группируются по отрезкам, как в остальных пакетных функциях
+    order = np.argsort(owner[keep], kind="stable")
+    offsets = np.zeros(len(segments) + 1, dtype=np.int64)
+    np.cumsum(np.bincount(owner[keep], minlength=len(segments)), out=offsets[1:])
+    return points[keep][order], alpha[keep][order], offsets
+
+
+def polyline_coverage_batch(vertices, offsets, viewport=None):
+    # Пакет ломаных: вершины всех ломаных подряд, offsets - их границы.
+    # Каждый пиксель ломаной выдаётся один раз: там, где соседние звенья всё же
+    # задевают один пиксель (на изломах), берётся наибольшее покрытие, поэтому
+    # стыки не темнеют от двойного наложения. Замкнутая ломаная стыкуется и в начале
+    segments, owners, first, last = raster.polyline_links(vertices, offsets)
+    closed = (segments[first][:, :2] == segments[last][:, 2:]).all(axis=1) & (np.bincount(owners) > 1)[owners[first]]
+    full_start = ~first
+    skip_end = ~last
+    full_start[np.nonzero(first)[0][closed]] = True
+    skip_end[np.nonzero(last)[0][closed]] = True
+    points, alpha, seg_offsets = line_coverage_batch(segments, viewport, full_start, skip_end)
+    path = owners[np.repeat(np.arange(len(segments)), np.diff(seg_offsets))]
+    # Ключ пикселя внутри ломаной - одно целое, так np.unique работает с плоским массивом
+    lo = points.min(axis=0, initial=0)
+    size = points.max(axis=0, initial=0) - lo + 1
+    keys = (path * size[1] + points[:, 1] - lo[1]) * size[0] + points[:, 0] - lo[0]
+    _, index, inverse = np.unique(keys, return_index=True, return_inverse=True)
+    cover = np.zeros(len(index), dtype=alpha.dtype)
+    np.maximum.at(cover, inverse.reshape(-1), alpha)
+    # Порядок первого появления, чтобы пошаговая отрисовка шла вдоль ломаной
+    order = np.argsort(index, kind="stable")
+    path_offsets = np.zeros(len(offsets), dtype=np.int64)
+    np.cumsum(np.bincount(path[index], minlength=len(offsets) - 1), out=path_offsets[1:])
+    return points[index[order]], cover[order], path_offsets
+
+
+def polyline_coverage(vertices, viewport=None):
+    points, alpha, _ = polyline_coverage_batch(vertices, [0, len(vertices)], viewport)
+    return points, alpha
+
+
+def draw_lines(canvas, segments, color=framebuffer.BLACK):
+    fb = framebuffer.get_framebuffer(canvas)
+    points, alpha, _ = line_coverage_batch(segments, fb.viewport())
+    fb.blend_points(points, alpha, color)
+
+
+def draw_polyline(canvas, vertices, debug=False, color=framebuffer.BLACK):
+    # Вся ломаная - одно смешивание с кадровым буфером
+    fb = framebuffer.get_framebuffer(canvas)
+    points, alpha = polyline_coverage(vertices, fb.viewport())
+    if debug:
+        stepper.animate(canvas, zip(points[:, 0].tolist(), points[:, 1].tolist(), alpha.tolist()))
+        return
+    fb.blend_points(points, alpha, color)
 
 
+def draw_line(canvas, x0, y0, x1, y1, debug=False):
+    if not debug:
+        draw_lines(canvas, [(x0, y0, x1, y1)])
+        return
 
+    viewport = framebuffer.get_framebuffer(canvas).viewport()
+    stepper.animate(canvas, line_coverage(x0, y0, x1, y1, viewport))
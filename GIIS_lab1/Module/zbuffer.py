@@ -0,0 +1,63 @@
+import numpy as np
+
+# Сколько пикселей проверяется за один проход: треугольники идут пачками,
+# чтобы промежуточные массивы не росли вместе с размером модели
+SAMPLES = 1 << 21
+
+
+def _linear(xy, values):
+    # Коэффициенты (a, b, c) функции a x + b y + c, принимающей в вершинах
+    # треугольников значения values (k, 3); xy - вершины (k, 3, 2)
+    x, y = xy[:, :, 0], xy[:, :, 1]
+    area = (x[:, 1] - x[:, 0]) * (y[:, 2] - y[:, 0]) - (x[:, 2] - x[:, 0]) * (y[:, 1] - y[:, 0])
+    v = values
+    a = ((v[:, 1] - v[:, 0]) * (y[:, 2] - y[:, 0]) - (v[:, 2] - v[:, 0]) * (y[:, 1] - y[:, 0])) / area
+    b = ((x[:, 1] - x[:, 0]) * (v[:, 2] - v[:, 0]) - (x[:, 2] - x[:, 0]) * (v[:, 1] - v[:, 0])) / area
+    return a, b, v[:, 0] - a * x[:, 0] - b * y[:, 0]
+
+
+def rasterize(xy, inv_w, width, height):
+    # Заливка треугольников с буфером глубины. xy (k, 3, 2) - вершины в пикселях
+    # экрана, inv_w (k, 3) - 1 / W вершин: эта величина линейна по экрану, поэтому
+    # интерполируется без перспективной поправки и служит глубиной (больше - ближе).
+    # Пиксель с центром (x, y) закрашивается, если точка лежит в треугольнике.
+    # Возвращает буфер глубины (0 - пусто) и номер треугольника в каждом пикселе (-1 - пусто)
+    depth = np.zeros(width * height)
+    owner = np.full(width * height, -1, dtype=np.int64)
+    x0 = np.maximum(np.ceil(xy[:, :, 0].min(axis=1)), 0).astype(np.int64)
+    y0 = np.maximum(np.ceil(xy[:, :, 1].min(axis=1)), 0).astype(np.int64)
+    x1 = np.minimum(np.floor(xy[:, :, 0].max(axis=1)), width - 1).astype(np.int64)
+    y1 = np.minimum(np.floor(xy[:, :, 1].max(axis=1)), height - 1).astype(np.int64)
+    keep = np.nonzero((x0 <= x1) & (y0 <= y1))[0]
+    if len(keep) == 0:
+        return depth.reshape(height, width), owner.reshape(height, width)
+    xy, inv_w = xy[keep], inv_w[keep]
+    x0, y0, x1, y1 = x0[keep], y0[keep], x1[keep], y1[keep]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        # Барицентрические координаты и глубина - линейные функции пикселя
+        edges = [_linear(xy, np.eye(3)[i][None, :].repeat(len(keep), axis=0)) for i in range(3)]
+        plane = _linear(xy, inv_w)
+    box_width = x1 - x0 + 1
+    sizes = box_width * (y1 - y0 + 1)
+    ends = np.cumsum(sizes)
+    start = 0
+    while start < len(keep):
+        # Пачка треугольников, в рамках которых вместе не больше SAMPLES пикселей
+        stop = max(int(np.searchsorted(ends, ends[start] - sizes[start] + SAMPLES, side="right")), start + 1)
+        tri = np.repeat(np.arange(start, stop), sizes[start:stop])
+        local = np.arange(len(tri)) - np.repeat(ends[start:stop] - sizes[start:stop] - (ends[start] - sizes[start]),
+                                                sizes[start:stop])
+        px = x0[tri] + local % box_width[tri]
+        py = y0[tri] + local // box_width[tri]
+        inside = np.ones(len(tri), dtype=bool)
+        for a, b, c in edges:
+            inside &= a[tri] * px + b[tri] * py + c[tri] >= -1e-9
+        tri, px, py = tri[inside], px[inside], py[inside]
+        a, b, c = plane
+        z = a[tri] * px + b[tri] * py + c[tri]
+        flat = py * width + px
+        np.maximum.at(depth, flat, z)
+        nearest = z >= depth[flat]
+        owner[flat[nearest]] = keep[tri[nearest]]
+        start = stop
+    return depth.reshape(height, width), owner.reshape(height, width)
@@ -0,0 +1,308 @@
+import argparse
+import json
+import math
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+import Module.b_spline as b_spline
+import Module.bresenham as bresenham
+import Module.circle as circle
+import Module.curve as curve
+import Module.dda as dda
+import Module.ddd as ddd
+import Module.ellipse as ellipse
+import Module.framebuffer as framebuffer
+import Module.hermit as hermit
+import Module.hyperbola as hyperbola
+import Module.parabola as parabola
+import Module.wu as wu
+
+SIZES = (10, 100, 1000)
+ANGLES = (0, 15, 30, 45, 60, 75, 90)
+COUNTS = (1, 100, 10000)
+CANVAS_SIZE = 1024
+
+
+def measure(run, repeats):
+    # run() возвращает число пикселей; первый прогон прогревочный
+    pixels = run()
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        run()
+        times.append(time.perf_counter() - start)
+    return pixels, times
+
+
+def record(results, name, params, count, pixels, times):
+    median = statistics.median(times)
+    results.append({
+        "name": name,
+        "params": params,
+        "primitives": count,
+        "pixels": pixels,
+        "repeats": len(times),
+        "min_s": min(times),
+        "median_s": median,
+        "mean_s": statistics.fmean(times),
+        "stdev_s": statistics.stdev(times) if len(times) > 1 else 0.0,
+        "pixels_per_s": pixels / median if median > 0 else None,
+        "latency_us": median / count * 1e6,
+    })
+    print(f"{name:28s} {json.dumps(params):40s} {pixels:>9d} px  {median * 1e3:9.3f} мс"
+          f"  {pixels / max(median, 1e-12) / 1e6:8.2f} Мпикс/с", file=sys.stderr)
+
+
+def segment(length, angle, x0=0, y0=0):
+    a = math.radians(angle)
+    return x0, y0, x0 + int(round(length * math.cos(a))), y0 + int(round(length * math.sin(a)))
+
+
+def random_segments(count, length, rng):
+    angles = rng.uniform(0, 2 * math.pi, count)
+    x0 = rng.integers(0, CANVAS_SIZE, count)
+    y0 = rng.integers(0, CANVAS_SIZE, count)
+    x1 = x0 + np.rint(length * np.cos(angles)).astype(np.int64)
+    y1 = y0 + np.rint(length * np.sin(angles)).astype(np.int64)
+    return np.stack([x0, y0, x1, y1], axis=1)
+
+
+def bench_lines(results, repeats, sizes, angles):
+    generators = {
+        "dda.line_points": dda.line_points,
+        "bresenham.line_points": bresenham.line_points,
+        "bresenham.line_spans": lambda *s: ((x, y) for x, y, n, axis in bresenham.line_spans(*s) for _ in range(n)),
+        "wu.line_coverage": wu.line_coverage,
+    }
+    for name, generator in generators.items():
+        for length in sizes:
+            for angle in angles:
+                s = segment(length, angle)
+                pixels, times = measure(lambda: sum(1 for _ in generator(*s)), repeats)
+                record(results, name, {"length": length, "angle": angle}, 1, pixels, times)
+
+
+def bench_conics(results, repeats, sizes):
+    viewport = (-CANVAS_SIZE, -CANVAS_SIZE, CANVAS_SIZE, CANVAS_SIZE)
+    for r in sizes:
+        cases = {
+            "circle.circle_points": lambda: circle.circle_points(0, 0, r),
+            "ellipse.ellipse_points": lambda: ellipse.ellipse_points(0, 0, r, max(r // 2, 1)),
+            "hyperbola.hyperbola_points": lambda: hyperbola.hyperbola_points(0, 0, r, max(r // 2, 1), viewport),
+            "parabola.parabola_points": lambda: parabola.parabola_points(0, 0, 1.0 / r, viewport),
+        }
+        for name, generator in cases.items():
+            pixels, times = measure(lambda: sum(1 for _ in generator()), repeats)
+            record(results, name, {"size": r}, 1, pixels, times)
+
+
+def bench_curves(results, repeats, sizes):
+    for size in sizes:
+        P = ((0, 0), (size, size), (0, size), (size, 0))
+        cases = {
+            "bezier.bezier_points": lambda: curve.bezier_points(*P),
+            "hermit.hermite_points": lambda: hermit.hermite_points(P[0], P[3], (size, 0), (0, size)),
+            "b_spline.bspline_points": lambda: b_spline.bspline_points(P + ((size, size),)),
+            "b_spline.BSplineCurve": lambda: b_spline.BSplineCurve(P + ((size, size),)).points(),
+        }
+        for name, generator in cases.items():
+            pixels, times = measure(lambda: sum(1 for _ in generator()), repeats)
+            record(results, name, {"size": size}, 1, pixels, times)
+
+
+def bench_batches(results, repeats, counts, rng):
+    for count in counts:
+        segments = random_segments(count, 100, rng)
+        centers = segments[:, :2]
+        radii = rng.integers(1, 100, count)
+        geometry = rng.uniform(0, CANVAS_SIZE, (count, 4, 2))
+        cases = {
+            "dda.line_points_batch": lambda: len(dda.line_points_batch(segments)[0]),
+            "bresenham.line_points_batch": lambda: len(bresenham.line_points_batch(segments)[0]),
+            "wu.line_coverage_batch": lambda: len(wu.line_coverage_batch(segments)[0]),
+            "circle.circle_points_batch": lambda: len(circle.circle_points_batch(centers, radii)[0]),
+            "ellipse.ellipse_points_batch": lambda: len(ellipse.ellipse_points_batch(centers, radii, radii // 2)[0]),
+            "curve.curve_points_batch": lambda: len(curve.curve_points_batch("bezier", geometry)[0]),
+        }
+        for name, run in cases.items():
+            pixels, times = measure(run, repeats)
+            record(results, name, {"length": 100}, count, pixels, times)
+
+
+def bench_draw(results, repeats, counts, rng):
+    # Полный путь до кадрового буфера: растеризация, отсечение и запись пикселей
+    for count in counts:
+        segments = random_segments(count, 100, rng)
+        # Связная ломаная из тех же count звеньев
+        path = np.cumsum(np.concatenate([segments[:1, :2], segments[:, 2:] - segments[:, :2]]), axis=0)
+        # Та же ломаная как проволочная 3D-модель в плоскости z = 0
+        mesh = ddd.Object3D()
+        mesh.vertices = np.hstack([path - CANVAS_SIZE / 2, np.zeros((len(path), 1))]).astype(np.float32)
+        mesh.edges = np.stack([np.arange(count), np.arange(1, count + 1)], axis=1)
+        canvas = framebuffer.NullCanvas(CANVAS_SIZE, CANVAS_SIZE)
+        fb = framebuffer.get_framebuffer(canvas)
+        cases = {
+            "bresenham.draw_lines": lambda: bresenham.draw_lines(canvas, segments),
+            "wu.draw_lines": lambda: wu.draw_lines(canvas, segments),
+            "bresenham.draw_polyline": lambda: bresenham.draw_polyline(canvas, path),
+            "wu.draw_polyline": lambda: wu.draw_polyline(canvas, path),
+            "circle.draw_circles": lambda: circle.draw_circles(canvas, segments[:, :2], 50),
+            "ddd.draw_wireframe": lambda: ddd.draw_wireframe(canvas, mesh),
+        }
+        for name, draw in cases.items():
+            fb.clear()
+            draw()
+            fb.flush()
+            touched = int(np.count_nonzero((fb.pixels != fb.background).any(axis=2)))
+
+            def run():
+                draw()
+                fb.flush()
+                return touched
+            pixels, times = measure(run, repeats)
+            record(results, name, {"canvas": CANVAS_SIZE}, count, pixels, times)
+
+
+def sphere_mesh(rows):
+    # Сфера из rows x rows вершин и ~2 rows^2 треугольников, обход снаружи против часовой стрелки
+    u, v = np.meshgrid(np.linspace(0.01, math.pi - 0.01, rows), np.linspace(0, 2 * math.pi, rows, endpoint=False),
+                       indexing="ij")
+    mesh = ddd.Object3D()
+    mesh.vertices = (np.stack([np.sin(u) * np.cos(v), np.sin(u) * np.sin(v), np.cos(u)], axis=-1)
+                     .reshape(-1, 3) * CANVAS_SIZE / 8).astype(np.float32)
+    index = np.arange(rows * rows).reshape(rows, rows)
+    a, b = index[:-1], index[1:]
+    c, d = np.roll(b, -1, axis=1), np.roll(a, -1, axis=1)
+    mesh.faces = np.concatenate([np.stack([a, b, c], axis=-1), np.stack([a, c, d], axis=-1)]).reshape(-1, 3)
+    mesh.edges = np.concatenate([np.stack([a, b], axis=-1), np.stack([a, d], axis=-1),
+                                 np.stack([a, c], axis=-1)]).reshape(-1, 2)
+    return mesh
+
+
+def floor_mesh(rows):
+    # Пол из rows x rows вершин под камерой: ближний край уходит за ближнюю плоскость
+    x, z = np.meshgrid(np.linspace(-1, 1, rows), np.linspace(-1, 2, rows), indexing="ij")
+    mesh = ddd.Object3D()
+    mesh.vertices = (np.stack([x * CANVAS_SIZE, np.full_like(x, CANVAS_SIZE / 16), z * CANVAS_SIZE], axis=-1)
+                     .reshape(-1, 3)).astype(np.float32)
+    index = np.arange(rows * rows).reshape(rows, rows)
+    a, b = index[:-1, :-1], index[1:, :-1]
+    c, d = index[1:, 1:], index[:-1, 1:]
+    mesh.faces = np.concatenate([np.stack([a, c, d], axis=-1), np.stack([a, b, c], axis=-1)]).reshape(-1, 3)
+    mesh.edges = np.concatenate([np.stack([a, b], axis=-1), np.stack([a, d], axis=-1),
+                                 np.stack([a, c], axis=-1)]).reshape(-1, 2)
+    return mesh
+
+
+def bench_mesh(results, repeats, counts):
+    # Кадр 3D-редактора в трёх режимах: каркас, заливка с z-буфером, без невидимых линий.
+    # Сфера целиком перед камерой, пол пересекает ближнюю плоскость и отсекается
+    canvas = framebuffer.NullCanvas(CANVAS_SIZE, CANVAS_SIZE)
+    fb = framebuffer.get_framebuffer(canvas)
+    for count, shape in ((count, shape) for count in counts for shape in ("sphere", "floor")):
+        rows = max(int(math.sqrt(count / 2)), 3)
+        if shape == "sphere":
+            mesh = sphere_mesh(rows)
+            mesh.rotate((1, 0, 0), 0.5)
+        else:
+            mesh = floor_mesh(rows)
+        cases = {
+            "ddd.wireframe": lambda: ddd.draw_wireframe(canvas, mesh),
+            "ddd.solid": lambda: ddd.draw_solid(canvas, mesh),
+            "ddd.hidden_lines": lambda: ddd.draw_solid(canvas, mesh, hidden_lines=True),
+        }
+        for name, draw in cases.items():
+            def run():
+                draw()
+                fb.flush()
+                return int(np.count_nonzero((fb.pixels != fb.background).any(axis=2)))
+            pixels, times = measure(run, repeats)
+            record(results, name, {"canvas": CANVAS_SIZE, "mesh": shape, "triangles": len(mesh.faces)}, len(mesh.faces),
+                   pixels, times)
+
+
+def bench_startup(results, repeats):
+    # Холодный старт редактора: каждый раз новый процесс, main.py сам печатает
+    # время до первого показа окна и закрывается. Нужен дисплей
+    times = []
+    for _ in range(repeats):
+        output = subprocess.run([sys.executable, os.path.join(os.path.dirname(__file__), "main.py"), "--startup-time"], capture_output=True,
+                                text=True, check=True).stderr
+        times.append(float(output.split()[-2]) / 1000)
+    record(results, "main.startup", {}, 1, 0, times)
+
+
+def crosscheck(sizes, angles):
+    # ЦДА и Брезенхэм должны ставить почти одни и те же пиксели;
+    # расхождения возможны только там, где идеальная прямая проходит ровно посередине
+    report = []
+    for length in sizes:
+        for angle in angles:
+            s = segment(length, angle)
+            a = set(dda.line_points(*s))
+            b = set(bresenham.line_points(*s))
+            report.append({"length": length, "angle": angle, "dda": len(a), "bresenham": len(b),
+                           "only_dda": len(a - b), "only_bresenham": len(b - a),
+                           "agreement": len(a & b) / max(len(a | b), 1)})
+    return report
+
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Замеры алгоритмов растеризации без окна Tk")
+    parser.add_argument("-o", "--output", default="benchmark.json", help="файл с результатами JSON")
+    parser.add_argument("-r", "--repeats", type=int, default=7, help="повторов на замер")
+    parser.add_argument("--quick", action="store_true", help="малые размеры и число примитивов")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--startup", action="store_true", help="замерить запуск окна редактора")
+    args = parser.parse_args()
+
+    sizes = SIZES[:2] if args.quick else SIZES
+    counts = COUNTS[:2] if args.quick else COUNTS
+    rng = np.random.default_rng(args.seed)
+
+    results = []
+    bench_lines(results, args.repeats, sizes, ANGLES)
+    bench_conics(results, args.repeats, sizes)
+    bench_curves(results, args.repeats, sizes)
+    bench_batches(results, args.repeats, counts, rng)
+    bench_draw(results, args.repeats, counts, rng)
+    # Размер сетки из задачи (~100k треугольников) замеряется и в быстром режиме
+    bench_mesh(results, args.repeats, (100000,) if args.quick else (1000, 100000))
+    if args.startup:
+        bench_startup(results, args.repeats)
+
+    report = {
+        "meta": {
+            "revision": git_revision(),
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "machine": platform.machine(),
+            "platform": platform.platform(),
+            "repeats": args.repeats,
+            "seed": args.seed,
+        },
+        "results": results,
+        "crosscheck": crosscheck(SIZES, ANGLES),
+    }
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"Результаты записаны в {args.output}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,61 +1,55 @@
+import time
+
+START_TIME = time.perf_counter()
+
 import tkinter as tk
-from tkinter import messagebox, Toplevel
+from tkinter import messagebox, Toplevel, filedialog
 import math
+import os
+import sys
 
-import Module.dda as dda
-import Module.bresenham as bresenham
-import Module.wu as wu
-import Module.circle as circle
-import Module.ellipse as ellipse
-import Module.hyperbola as hyperbola
-import Module.parabola as parabola
-import Module.hermit as hermit
-import Module.bezier as bezier
-import Module.b_spline as b_spline
-import Module.ddd as editor3d
+# Алгоритмы, сцена с numpy и 3D-редактор импортируются при первом обращении,
+# чтобы окно появлялось без ожидания их загрузки
+import Module.registry as registry
 
 selected_algorithm = None
+selected_kind = None
 debug_mode = False
 start_point = None
-scale_factor = 1.0
 mode = "line"
-parametric_mode = None
 control_points_param = []
-
+dragged_spline = None
+dragged_point = None
+pan_start = None
+selected_primitive = None
+recording = False
+last_trace = None
+scene = None
+
+
+def get_scene():
+    # Сцена тянет за собой numpy, поэтому создаётся при первом рисовании
+    global scene
+    if scene is None:
+        scene = registry.load("scene").Scene(canvas)
+    return scene
 
 def open_3d_editor():
     win = Toplevel()
     win.title("3D Редактор")
-    editor3d.Editor3D(win, object_file="object.txt")
-
-
-def set_algorithm(algorithm_module):
-    global selected_algorithm, start_point, mode
-    selected_algorithm = algorithm_module
-    start_point = None
-    mode = "line"
-    status_var.set("Выбран алгоритм: " + algorithm_module.__name__)
+    # Модель по умолчанию лежит рядом с программой, а не в текущем каталоге
+    object_file = os.path.join(os.path.dirname(os.path.abspath(__file__)), "object.txt")
+    registry.load("ddd").Editor3D(win, object_file=object_file)
 
-def set_curve(algorithm_module):
-    global selected_algorithm, start_point, mode
-    selected_algorithm = algorithm_module
-    start_point = None
-    mode = "curve"
-    status_var.set("Выбран алгоритм: " + algorithm_module.__name__)
 
-def set_parametric_curve(curve_type):
-    global selected_algorithm, start_point, mode, parametric_mode, control_points_param
-    mode = "parametric"
-    parametric_mode = curve_type
+def select_algorithm(entry):
+    global selected_algorithm, selected_kind, start_point, mode, control_points_param
+    selected_algorithm = registry.load(entry["module"])
+    selected_kind = entry["kind"]
+    mode = entry["mode"]
     start_point = None
     control_points_param = []
-    if curve_type == "hermite":
-        selected_algorithm = hermit
-    elif curve_type == "bezier":
-        selected_algorithm = bezier
-    elif curve_type == "bspline":
-        selected_algorithm = b_spline
-    status_var.set(f"Выбран параметрический метод: {curve_type.capitalize()}")
+    status_var.set(entry.get("hint", "Выбран алгоритм: " + entry["label"]))
 
 def toggle_debug():
     global debug_mode
@@ -63,14 +57,96 @@ def toggle_debug():
     status = "ON" if debug_mode else "OFF"
     status_var.set(f"Отладочный режим: {status}")
 
+def debug_pause():
+    scheduler = registry.load("stepper").get_scheduler(canvas)
+    scheduler.toggle_pause()
+    status_var.set("Отрисовка на паузе" if scheduler.paused else "Отрисовка продолжается")
+
+def debug_step():
+    scheduler = registry.load("stepper").get_scheduler(canvas)
+    scheduler.step()
+    status_var.set("Отрисовка на паузе" if scheduler.paused else "Нет отрисовки для шага")
+
+def debug_cancel():
+    registry.load("stepper").get_scheduler(canvas).cancel()
+    status_var.set("Отрисовка отменена")
+
+def debug_finish():
+    registry.load("stepper").get_scheduler(canvas).finish()
+
+def debug_speed(faster):
+    scheduler = registry.load("stepper").get_scheduler(canvas)
+    if faster:
+        scheduler.faster()
+    else:
+        scheduler.slower()
+    status_var.set(f"Скорость отрисовки: {scheduler.batch} пикс. за {scheduler.delay} мс")
+
+def toggle_recording():
+    global recording
+    recording = not recording
+    status_var.set(f"Запись трассы: {'ON' if recording else 'OFF'}")
+
+def new_trace():
+    global last_trace
+    if not recording:
+        return None
+    last_trace = registry.load("trace").Trace()
+    return last_trace
+
+def save_trace():
+    if last_trace is None:
+        status_var.set("Трасса не записана")
+        return
+    path = filedialog.asksaveasfilename(defaultextension=".trace",
+                                        filetypes=[("Трасса", "*.trace"), ("CSV", "*.csv")])
+    if path:
+        last_trace.save(path)
+        status_var.set(f"Трасса сохранена: {path} ({len(last_trace)} строк)")
+
+def replay_trace():
+    global last_trace
+    path = filedialog.askopenfilename(filetypes=[("Трасса", "*.trace"), ("CSV", "*.csv")])
+    if not path:
+        return
+    trace = registry.load("trace")
+    try:
+        last_trace = trace.load(path)
+    except ValueError as e:
+        messagebox.showerror("Ошибка", str(e))
+        return
+    trace.replay(canvas, last_trace)
+    status_var.set(f"Воспроизведение трассы: {', '.join(last_trace.fields)}")
+
+def save_scene():
+    path = filedialog.asksaveasfilename(defaultextension=".scene", filetypes=[("Сцена", "*.scene")])
+    if path:
+        registry.load("scene_file").save(get_scene(), path)
+        status_var.set(f"Сцена сохранена: {path} ({len(scene.primitives)} примитивов)")
+
+def open_scene():
+    global selected_primitive, dragged_spline, dragged_point
+    path = filedialog.askopenfilename(filetypes=[("Сцена", "*.scene")])
+    if not path:
+        return
+    try:
+        registry.load("scene_file").load(get_scene(), path)
+    except ValueError as e:
+        messagebox.showerror("Ошибка", str(e))
+        return
+    selected_primitive = dragged_spline = dragged_point = None
+    status_var.set(f"Сцена загружена: {path} ({len(scene.primitives)} примитивов)")
+
 def on_canvas_click(event):
     global start_point, control_points_param
     if selected_algorithm is None:
         messagebox.showwarning("Не выбран алгоритм", "Сначала выберите алгоритм из меню!")
         return
 
-    x = int(round(event.x / scale_factor))
-    y = int(round(event.y / scale_factor))
+    scene = get_scene()
+    x, y = scene.to_logical(event.x, event.y)
+    x = int(round(x))
+    y = int(round(y))
 
     if mode == "line":
         if start_point is None:
@@ -79,85 +155,136 @@ def on_canvas_click(event):
         else:
             end_point = (x, y)
             status_var.set(f"Отрезок: {start_point} -> {end_point}")
-            selected_algorithm.draw_line(canvas, start_point[0], start_point[1],
-                                         end_point[0], end_point[1], debug_mode)
+            scene.add("line", selected_algorithm, (start_point[0], start_point[1],
+                                                    end_point[0], end_point[1]), debug_mode, new_trace())
             start_point = None
 
     elif mode == "curve":
         if start_point is None:
             start_point = (x, y)
-            if selected_algorithm == circle:
+            if selected_kind == "circle":
                 status_var.set(f"Центр окружности: {start_point}. Выберите точку на окружности.")
-            elif selected_algorithm == ellipse:
+            elif selected_kind == "ellipse":
                 status_var.set(f"Центр эллипса: {start_point}. Выберите точку для определения полуосей.")
-            elif selected_algorithm == hyperbola:
+            elif selected_kind == "hyperbola":
                 status_var.set(f"Центр гиперболы: {start_point}. Выберите точку для определения параметров a и b.")
-            elif selected_algorithm == parabola:
+            elif selected_kind == "parabola":
                 status_var.set(f"Вершина параболы: {start_point}. Выберите точку для определения параметра a.")
             else:
                 status_var.set(f"Центр: {start_point}. Выберите вторую точку.")
         else:
             second_point = (x, y)
-            if selected_algorithm == circle:
+            if selected_kind == "circle":
                 dx = second_point[0] - start_point[0]
                 dy = second_point[1] - start_point[1]
                 radius = int(round(math.sqrt(dx*dx + dy*dy)))
                 status_var.set(f"Окружность: центр {start_point}, радиус {radius}")
-                selected_algorithm.draw_circle(canvas, start_point[0], start_point[1], radius, debug_mode)
-            elif selected_algorithm == ellipse:
+                scene.add("circle", selected_algorithm, (start_point[0], start_point[1], radius), debug_mode, new_trace())
+            elif selected_kind == "ellipse":
                 rx = abs(second_point[0] - start_point[0])
                 ry = abs(second_point[1] - start_point[1])
                 status_var.set(f"Эллипс: центр {start_point}, rx {rx}, ry {ry}")
-                selected_algorithm.draw_ellipse(canvas, start_point[0], start_point[1], rx, ry, debug_mode)
-            elif selected_algorithm == hyperbola:
+                scene.add("ellipse", selected_algorithm, (start_point[0], start_point[1], rx, ry), debug_mode, new_trace())
+            elif selected_kind == "hyperbola":
                 a = abs(second_point[0] - start_point[0])
                 b = abs(second_point[1] - start_point[1])
                 status_var.set(f"Гипербола: центр {start_point}, a {a}, b {b}")
-                selected_algorithm.draw_hyperbola(canvas, start_point[0], start_point[1], a, b, debug_mode)
-            elif selected_algorithm == parabola:
+                scene.add("hyperbola", selected_algorithm, (start_point[0], start_point[1], a, b), debug_mode)
+            elif selected_kind == "parabola":
                 if second_point[0] == start_point[0]:
                     messagebox.showerror("Ошибка", "Невозможно определить параметр a (x-координаты совпадают).")
                 else:
                     a_param = (second_point[1] - start_point[1]) / ((second_point[0] - start_point[0]) ** 2)
                     status_var.set(f"Парабола: вершина {start_point}, a = {a_param:.4f}")
-                    selected_algorithm.draw_parabola(canvas, start_point[0], start_point[1], a_param, debug_mode)
+                    scene.add("parabola", selected_algorithm, (start_point[0], start_point[1], a_param), debug_mode)
             start_point = None
 
+    elif mode == "polyline":
+        control_points_param.append((x, y))
+        status_var.set(f"Вершины ломаной: {len(control_points_param)}. Enter - закончить")
+
     elif mode == "parametric":
         control_points_param.append((x, y))
         status_var.set(f"Опорные точки: {len(control_points_param)}")
-        if (parametric_mode in ["hermite", "bezier"] and len(control_points_param) == 4) or \
-           (parametric_mode == "bspline" and len(control_points_param) == 4):
-            if parametric_mode == "hermite":
-                hermit.draw_hermite_curve(canvas, control_points_param[0],
-                                          control_points_param[1],
-                                          control_points_param[2],
-                                          control_points_param[3],
-                                          debug_mode)
+        if selected_kind in ["hermite", "bezier"] and len(control_points_param) == 4:
+            if selected_kind == "hermite":
+                scene.add("hermite", selected_algorithm, tuple(control_points_param), debug_mode)
                 status_var.set("Нарисована кривая Эрмита")
-            elif parametric_mode == "bezier":
-                bezier.draw_bezier_curve(canvas, control_points_param[0],
-                                         control_points_param[1],
-                                         control_points_param[2],
-                                         control_points_param[3],
-                                         debug_mode)
+            elif selected_kind == "bezier":
+                scene.add("bezier", selected_algorithm, tuple(control_points_param), debug_mode)
                 status_var.set("Нарисована кривая Безье")
-            elif parametric_mode == "bspline":
-                b_spline.draw_bspline_curve(canvas, control_points_param, debug_mode)
-                status_var.set("Нарисована кривая B-сплайн")
             control_points_param = []
+
+def finish_path(event=None):
+    global control_points_param
+    scene = get_scene()
+    if mode == "polyline":
+        if len(control_points_param) < 2:
+            status_var.set("Для ломаной нужно минимум 2 вершины")
+            return
+        scene.add("polyline", selected_algorithm, tuple(control_points_param), debug_mode)
+        status_var.set(f"Нарисована ломаная ({len(control_points_param)} вершин)")
+        control_points_param = []
+        return
+    if mode != "parametric" or selected_kind != "bspline":
+        return
+    if len(control_points_param) < 4:
+        status_var.set("Для B-сплайна нужно минимум 4 опорные точки")
+        return
+    scene.add("bspline", selected_algorithm, tuple(control_points_param), debug_mode)
+    status_var.set(f"Нарисована кривая B-сплайн ({len(control_points_param)} опорных точек)")
+    control_points_param = []
+
+def on_shift_press(event):
+    global dragged_spline, dragged_point
+    dragged_spline, dragged_point = get_scene().nearest_spline_point(event.x, event.y)
+
+def on_shift_drag(event):
+    if dragged_spline is None or dragged_spline["spline"] is None:
+        return
+    scene.move_spline_point(dragged_spline, dragged_point, event.x, event.y)
+    point = dragged_spline["params"][dragged_point]
+    status_var.set(f"Опорная точка {dragged_point}: ({point[0]:.0f}, {point[1]:.0f})")
+
+def on_select(event):
+    global selected_primitive
+    selected_primitive = get_scene().pick(event.x, event.y)
+    if selected_primitive is None:
+        status_var.set("Под курсором ничего нет")
+        return
+    status_var.set(f"Выбран примитив №{selected_primitive['id']}: {selected_primitive['kind']} "
+                   f"{selected_primitive['params']}. Delete - удалить")
+
+def delete_selected(event=None):
+    global selected_primitive
+    scene = get_scene()
+    if selected_primitive is None or selected_primitive not in scene.primitives:
+        return
+    scene.remove(selected_primitive)
+    status_var.set(f"Примитив №{selected_primitive['id']} удалён")
+    selected_primitive = None
+
+def on_pan_press(event):
+    global pan_start
+    pan_start = (event.x, event.y)
+
+def on_pan_drag(event):
+    global pan_start
+    if pan_start is None:
+        return
+    get_scene().pan(event.x - pan_start[0], event.y - pan_start[1])
+    pan_start = (event.x, event.y)
+
 def zoom(factor, pivot_x=0, pivot_y=0):
-    global scale_factor
-    new_scale = scale_factor * factor
-    canvas.scale("all", pivot_x, pivot_y, factor, factor)
-    scale_factor = new_scale
-    status_var.set(f"Масштаб: {scale_factor:.2f}")
+    scene = get_scene()
+    scene.zoom(factor, pivot_x, pivot_y)
+    status_var.set(f"Масштаб: {scene.scale:.2f}")
 
 def zoom_in():
     zoom(2.0, 0, 0)
 
 def zoom_out():
-    if scale_factor <= 1.0:
+    if get_scene().scale <= 1.0:
         return
     zoom(0.5, 0, 0)
 
@@ -174,28 +301,34 @@ root.geometry("800x600")
 menu_bar = tk.Menu(root)
 root.config(menu=menu_bar)
 
-line_menu = tk.Menu(menu_bar, tearoff=0)
-menu_bar.add_cascade(label="Отрезки", menu=line_menu)
-line_menu.add_command(label="Алгоритм ЦДА", command=lambda: set_algorithm(dda))
-line_menu.add_command(label="Алгоритм Брезенхэма", command=lambda: set_algorithm(bresenham))
-line_menu.add_command(label="Алгоритм Ву", command=lambda: set_algorithm(wu))
-
-curve_menu = tk.Menu(menu_bar, tearoff=0)
-menu_bar.add_cascade(label="Линии второго порядка", menu=curve_menu)
-curve_menu.add_command(label="Окружность", command=lambda: set_curve(circle))
-curve_menu.add_command(label="Эллипс", command=lambda: set_curve(ellipse))
-curve_menu.add_command(label="Гипербола", command=lambda: set_curve(hyperbola))
-curve_menu.add_command(label="Парабола", command=lambda: set_curve(parabola))
-
-parametric_menu = tk.Menu(menu_bar, tearoff=0)
-menu_bar.add_cascade(label="Кривые", menu=parametric_menu)
-parametric_menu.add_command(label="Эрмит", command=lambda: set_parametric_curve("hermite"))
-parametric_menu.add_command(label="Безье", command=lambda: set_parametric_curve("bezier"))
-parametric_menu.add_command(label="B-сплайн", command=lambda: set_parametric_curve("bspline"))
+file_menu = tk.Menu(menu_bar, tearoff=0)
+menu_bar.add_cascade(label="Файл", menu=file_menu)
+file_menu.add_command(label="Открыть сцену...", command=open_scene)
+file_menu.add_command(label="Сохранить сцену...", command=save_scene)
+
+for title, modes in registry.MENUS:
+    algorithm_menu = tk.Menu(menu_bar, tearoff=0)
+    menu_bar.add_cascade(label=title, menu=algorithm_menu)
+    for i, menu_mode in enumerate(modes):
+        if i:
+            algorithm_menu.add_separator()
+        for entry in registry.entries(menu_mode):
+            algorithm_menu.add_command(label=entry["label"], command=lambda entry=entry: select_algorithm(entry))
 
 debug_menu = tk.Menu(menu_bar, tearoff=0)
 menu_bar.add_cascade(label="Отладка", menu=debug_menu)
 debug_menu.add_command(label="Переключить отладочный режим", command=toggle_debug)
+debug_menu.add_separator()
+debug_menu.add_command(label="Пауза / продолжить (Пробел)", command=debug_pause)
+debug_menu.add_command(label="Один шаг (→)", command=debug_step)
+debug_menu.add_command(label="Отменить фигуру (Esc)", command=debug_cancel)
+debug_menu.add_command(label="Дорисовать сразу (End)", command=debug_finish)
+debug_menu.add_command(label="Быстрее (+)", command=lambda: debug_speed(True))
+debug_menu.add_command(label="Медленнее (-)", command=lambda: debug_speed(False))
+debug_menu.add_separator()
+debug_menu.add_command(label="Запись трассы вкл/выкл", command=toggle_recording)
+debug_menu.add_command(label="Сохранить трассу...", command=save_trace)
+debug_menu.add_command(label="Воспроизвести трассу...", command=replay_trace)
 
 zoom_menu = tk.Menu(menu_bar, tearoff=0)
 menu_bar.add_cascade(label="Масштаб", menu=zoom_menu)
@@ -210,24 +343,36 @@ canvas = tk.Canvas(root, width=100, height=100, bg="white")
 canvas.pack(fill=tk.BOTH, expand=True)
 canvas.bind("<Button-1>", on_canvas_click)
 canvas.bind("<Button-3>", on_right_click)
-
-orig_create_rectangle = canvas.create_rectangle
-orig_create_line = canvas.create_line
-
-def create_rectangle_zoomed(x1, y1, x2, y2, *args, **kwargs):
-    return orig_create_rectangle(x1 * scale_factor, y1 * scale_factor,
-                                 x2 * scale_factor, y2 * scale_factor, *args, **kwargs)
-
-def create_line_zoomed(*args, **kwargs):
-    new_args = [coord * scale_factor for coord in args]
-    return orig_create_line(*new_args, **kwargs)
-
-canvas.create_rectangle = create_rectangle_zoomed
-canvas.create_line = create_line_zoomed
+canvas.bind("<Shift-Button-1>", on_shift_press)
+canvas.bind("<Shift-B1-Motion>", on_shift_drag)
+canvas.bind("<Control-Button-1>", on_select)
+canvas.bind("<Button-2>", on_pan_press)
+canvas.bind("<B2-Motion>", on_pan_drag)
+root.bind("<Return>", finish_path)
+root.bind("<Delete>", delete_selected)
+root.bind("<space>", lambda event: debug_pause())
+root.bind("<Right>", lambda event: debug_step())
+root.bind("<Escape>", lambda event: debug_cancel())
+root.bind("<End>", lambda event: debug_finish())
+root.bind("<plus>", lambda event: debug_speed(True))
+root.bind("<minus>", lambda event: debug_speed(False))
 
 status_var = tk.StringVar()
 status_var.set("Выберите алгоритм построения")
 status_bar = tk.Label(root, textvariable=status_var, bd=1, relief=tk.SUNKEN, anchor=tk.W)
 status_bar.pack(side=tk.BOTTOM, fill=tk.X)
 
+
+def on_first_map(event):
+    # Время от запуска интерпретатора до первого показа окна
+    if event.widget is not root:
+        return
+    root.unbind("<Map>")
+    elapsed = time.perf_counter() - START_TIME
+    print(f"Окно показано через {elapsed * 1000:.0f} мс", file=sys.stderr)
+    root.after_idle(root.destroy)
+
+if "--startup-time" in sys.argv:
+    root.bind("<Map>", on_first_map)
+
 root.mainloop()
@@ -0,0 +1,124 @@
+import argparse
+import os
+import struct
+import sys
+import time
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+import Module.clip as clip
+import Module.framebuffer as framebuffer
+import Module.scene as scene_module
+import Module.scene_file as scene_file
+
+TILE = 256
+
+
+def tiles(width, height, size):
+    for y in range(0, height, size):
+        for x in range(0, width, size):
+            yield x, y, min(size, width - x), min(size, height - y)
+
+
+def render_tile(view, box, columns):
+    # Плитка рисуется той же перерисовкой сцены, что и окно редактора, но в буфер,
+    # сдвинутый на угол плитки. Растеризаторы работают в координатах всего
+    # изображения и лишь отсекают по плитке, поэтому пиксели совпадают с целым кадром
+    x, y, width, height = box
+    canvas = framebuffer.NullCanvas(width, height)
+    canvas.framebuffer = framebuffer.FrameBuffer(canvas, width, height, offset_x=x, offset_y=y)
+    scene = scene_module.Scene(canvas)
+    for kind, algorithm, params in scene_file.decode(*columns):
+        scene.add(kind, algorithm, params, draw=False)
+    scene.scale, scene.origin_x, scene.origin_y = view
+    scene.redraw()
+    return box, canvas.framebuffer.pixels
+
+
+def render(scene, width, height, tile=TILE, workers=None):
+    # Примитивы раскладываются по плиткам по габаритам, плитки рисуются в пуле
+    # процессов и сшиваются в одно изображение. workers=1 - без пула, в этом процессе
+    view = (scene.scale, scene.origin_x, scene.origin_y)
+    bounds = scene.device_bounds()
+    image = np.empty((height, width, 3), dtype=np.uint8)
+    image[:] = framebuffer.WHITE
+    jobs = []
+    for box in tiles(width, height, tile or max(width, height)):
+        x, y, w, h = box
+        index = np.nonzero(clip.box_visible_mask(*bounds.T, (x, y, x + w, y + h)))[0]
+        if len(index):
+            jobs.append((view, box, scene_file.encode([scene.primitives[i] for i in index])))
+    if workers == 1:
+        results = (render_tile(*job) for job in jobs)
+    else:
+        pool = ProcessPoolExecutor(workers)
+        results = pool.map(render_tile, *zip(*jobs)) if jobs else ()
+    try:
+        for (x, y, w, h), pixels in results:
+            image[y:y + h, x:x + w] = pixels
+    finally:
+        if workers != 1:
+            pool.shutdown()
+    return image
+
+
+def render_serial(scene, width, height):
+    # Эталон: вся сцена одной перерисовкой в буфер размером с изображение
+    return render(scene, width, height, tile=None, workers=1)
+
+
+def write_image(path, pixels):
+    height, width = pixels.shape[:2]
+    if path.endswith(".ppm"):
+        with open(path, "wb") as f:
+            f.write(b"P6 %d %d 255\n" % (width, height))
+            f.write(pixels.tobytes())
+        return
+    # PNG без сторонних библиотек: строки с нулевым фильтром, сжатые zlib
+    def chunk(tag, data):
+        return struct.pack(">I", len(data)) + tag + data + struct.pack(">I", zlib.crc32(tag + data))
+    rows = np.hstack([np.zeros((height, 1), dtype=np.uint8), pixels.reshape(height, -1)])
+    with open(path, "wb") as f:
+        f.write(b"\x89PNG\r\n\x1a\n")
+        f.write(chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)))
+        f.write(chunk(b"IDAT", zlib.compress(rows.tobytes(), 6)))
+        f.write(chunk(b"IEND", b""))
+
+
+def load_scene(path, width, height):
+    canvas = framebuffer.NullCanvas(width, height)
+    scene = scene_module.Scene(canvas)
+    scene_file.load(scene, path, redraw=False)
+    return scene
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Офлайн-отрисовка сцены в файл изображения по плиткам")
+    parser.add_argument("scene", help="файл сцены .scene")
+    parser.add_argument("output", help="изображение .png или .ppm")
+    parser.add_argument("--size", default="1024x1024", help="размер изображения, ШИРИНАxВЫСОТА")
+    parser.add_argument("--tile", type=int, default=TILE, help="сторона плитки в пикселях")
+    parser.add_argument("-j", "--workers", type=int, default=os.cpu_count(), help="число процессов")
+    parser.add_argument("--check", action="store_true", help="сравнить с отрисовкой без плиток")
+    args = parser.parse_args()
+
+    width, height = (int(v) for v in args.size.lower().split("x"))
+    scene = load_scene(args.scene, width, height)
+    start = time.perf_counter()
+    image = render(scene, width, height, args.tile, args.workers)
+    elapsed = time.perf_counter() - start
+    print(f"{len(scene.primitives)} примитивов, {width}x{height}, плитка {args.tile}, "
+          f"процессов {args.workers}: {elapsed:.3f} с", file=sys.stderr)
+    if args.check:
+        start = time.perf_counter()
+        serial = render_serial(scene, width, height)
+        differing = int(np.count_nonzero((serial != image).any(axis=2)))
+        print(f"Без плиток: {time.perf_counter() - start:.3f} с, различающихся пикселей: {differing}",
+              file=sys.stderr)
+    write_image(args.output, image)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+import os
+import sys
+
+# Модули лабораторной импортируются как Module.xxx из каталога GIIS_lab1
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pytest
+
+import Module.b_spline as b_spline
+import Module.bezier as bezier
+import Module.bresenham as bresenham
+import Module.circle as circle
+import Module.dda as dda
+import Module.ellipse as ellipse
+import Module.framebuffer as framebuffer
+import Module.hermit as hermit
+import Module.hyperbola as hyperbola
+import Module.parabola as parabola
+import Module.scene as scene
+import Module.wu as wu
+
+
+@pytest.fixture
+def mixed_scene():
+    # Сцена со всеми типами примитивов, часть из них выходит за края холста 400x300
+    rng = np.random.default_rng(2)
+    sc = scene.Scene(framebuffer.NullCanvas(400, 300))
+    for i in range(300):
+        x, y = rng.uniform(-30, 330), rng.uniform(-30, 250)
+        size = rng.uniform(5, 150)
+        points = tuple(map(tuple, (rng.uniform(-size, size, (5, 2)) + (x, y)).tolist()))
+        k = i % 10
+        if k < 3:
+            sc.add("line", (bresenham, wu, dda)[k], (x, y) + points[0], draw=False)
+        elif k == 3:
+            sc.add("circle", circle, (x, y, rng.uniform(1, size / 2)), draw=False)
+        elif k == 4:
+            sc.add("ellipse", ellipse, (x, y, rng.uniform(1, size / 2), rng.uniform(1, size / 3)), draw=False)
+        elif k == 5:
+            sc.add("bezier", bezier, points[:4], draw=False)
+        elif k == 6:
+            sc.add("hermite", hermit, ((x, y), points[0], (size, 0), (0, -size)), draw=False)
+        elif k == 7:
+            sc.add("bspline", b_spline, points, draw=False)
+        else:
+            sc.add("polyline", (bresenham, wu)[k - 8], points, draw=False)
+    sc.add("hyperbola", hyperbola, (200, 150, 40, 20), draw=False)
+    sc.add("parabola", parabola, (150, 100, 0.01), draw=False)
+    sc.scale, sc.origin_x, sc.origin_y = 1.3, -7.3, 3.1
+    return sc
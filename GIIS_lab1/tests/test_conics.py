@@ -0,0 +1,76 @@
+import random
+
+import numpy as np
+import pytest
+
+import Module.circle as circle
+import Module.ellipse as ellipse
+import Module.hyperbola as hyperbola
+import Module.parabola as parabola
+
+WHOLE = (-2000, -2000, 2000, 2000)
+
+
+def inside(points, viewport):
+    return {(x, y) for x, y in points if viewport[0] <= x < viewport[2] and viewport[1] <= y < viewport[3]}
+
+
+def random_viewport(rnd):
+    x0, y0 = rnd.randint(-100, 300), rnd.randint(-300, 300)
+    return x0, y0, x0 + rnd.randint(1, 300), y0 + rnd.randint(1, 300)
+
+
+# Отсечённая кривая должна совпадать с неотсечённой, оставленной в пределах окна
+@pytest.mark.parametrize("params, viewport", [
+    ((41, -85, 191, 25), (163, -68, 452, 25)),
+])
+def test_hyperbola_enters_through_row_edge(params, viewport):
+    assert set(hyperbola.hyperbola_points(*params, viewport)) == inside(
+        hyperbola.hyperbola_points(*params, WHOLE), viewport)
+
+
+@pytest.mark.parametrize("params, viewport", [
+    ((-64, -80, 0.0356), (38, 149, 55, 447)),
+])
+def test_parabola_enters_through_column_edge(params, viewport):
+    assert set(parabola.parabola_points(*params, viewport)) == inside(
+        parabola.parabola_points(*params, WHOLE), viewport)
+
+
+def test_hyperbola_clipping_matches_unclipped():
+    rnd = random.Random(1)
+    for _ in range(300):
+        params = (rnd.randint(-50, 50), rnd.randint(-100, 100), rnd.randint(1, 200), rnd.randint(1, 200))
+        viewport = random_viewport(rnd)
+        assert set(hyperbola.hyperbola_points(*params, viewport)) == inside(
+            hyperbola.hyperbola_points(*params, WHOLE), viewport), (params, viewport)
+
+
+def test_parabola_clipping_matches_unclipped():
+    rnd = random.Random(2)
+    for _ in range(300):
+        params = (rnd.randint(-50, 50), rnd.randint(-100, 100), rnd.choice([-1, 1]) * rnd.uniform(0.001, 2))
+        viewport = random_viewport(rnd)
+        assert set(parabola.parabola_points(*params, viewport)) == inside(
+            parabola.parabola_points(*params, WHOLE), viewport), (params, viewport)
+
+
+def test_circle_and_ellipse_batches_match_scalar():
+    # Пакет выдаёт те же пиксели, что и цикл средней точки, но совпадающие
+    # симметричные точки (на осях и диагоналях) - по одному разу
+    rnd = random.Random(3)
+    for _ in range(200):
+        centers = np.array([[rnd.randint(-50, 200), rnd.randint(-50, 200)] for _ in range(4)])
+        rx = np.array([rnd.randint(0, 80) for _ in range(4)])
+        ry = np.array([rnd.randint(0, 80) for _ in range(4)])
+        for viewport in (None, random_viewport(rnd)):
+            points, offsets = circle.circle_points_batch(centers, rx, viewport)
+            for i, (cx, cy) in enumerate(centers.tolist()):
+                batch = list(map(tuple, points[offsets[i]:offsets[i + 1]].tolist()))
+                assert len(batch) == len(set(batch))
+                assert set(batch) == set(circle.circle_points(cx, cy, int(rx[i]), viewport))
+            points, offsets = ellipse.ellipse_points_batch(centers, rx, ry, viewport)
+            for i, (cx, cy) in enumerate(centers.tolist()):
+                batch = list(map(tuple, points[offsets[i]:offsets[i + 1]].tolist()))
+                assert len(batch) == len(set(batch))
+                assert set(batch) == set(ellipse.ellipse_points(cx, cy, int(rx[i]), int(ry[i]), viewport))
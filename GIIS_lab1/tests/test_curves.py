@@ -0,0 +1,36 @@
+import random
+
+import numpy as np
+import pytest
+
+import Module.b_spline as b_spline
+import Module.curve as curve
+
+
+def test_bspline_spans_match_flattened_bezier():
+    # Кубический равномерный сплайн по промежуткам совпадает с разбиением его кусков Безье
+    rnd = random.Random(3)
+    for _ in range(100):
+        points = [(rnd.uniform(0, 400), rnd.uniform(0, 400)) for _ in range(rnd.randint(4, 9))]
+        assert list(b_spline.BSplineCurve(points).points()) == list(curve.bspline_points(points))
+
+
+@pytest.mark.parametrize("degree, knots", [(1, "uniform"), (2, "uniform"), (3, "clamped"), (5, "clamped")])
+def test_bspline_follows_curve(degree, knots):
+    rnd = random.Random(degree)
+    points = [(rnd.uniform(0, 400), rnd.uniform(0, 400)) for _ in range(8)]
+    spline = b_spline.BSplineCurve(points, degree, knots)
+    pixels = np.array(list(spline.points()))
+    assert np.abs(np.diff(pixels, axis=0)).max() == 1
+    ts = np.linspace(spline.knots[degree], spline.knots[len(points)], 5000)
+    exact = np.array([b_spline.de_boor(t, degree, spline.knots, spline.control_points) for t in ts])
+    distance = np.sqrt(((pixels[:, None] - exact[None]) ** 2).sum(axis=2)).min(axis=1)
+    assert distance.max() < 1 + curve.FLATNESS
+
+
+def test_moving_point_matches_new_spline():
+    points = [(10, 10), (60, 200), (120, 20), (200, 150), (250, 40), (300, 200)]
+    spline = b_spline.BSplineCurve(points)
+    spline.move_point(2, (150, 250))
+    points[2] = (150, 250)
+    assert list(spline.points()) == list(b_spline.BSplineCurve(points).points())
@@ -0,0 +1,36 @@
+import numpy as np
+
+import Module.ddd as ddd
+import Module.framebuffer as framebuffer
+
+
+def test_floor_through_near_plane_is_clipped():
+    # Пол y = 50 от z = -400 (за камерой) до z = 500: видимая часть - трапеция
+    # до горизонта, обрезанная по W = NEAR, а не пропавшие треугольники
+    canvas = framebuffer.NullCanvas(200, 200)
+    fb = framebuffer.get_framebuffer(canvas)
+    obj = ddd.Object3D()
+    obj.vertices = np.array([[-200, 50, -400], [200, 50, -400], [200, 50, 500], [-200, 50, 500]], dtype=np.float32)
+    obj.faces = np.array([[0, 1, 2], [0, 2, 3]], dtype=np.int32)
+    obj.edges = np.array([[0, 1], [1, 2], [2, 3], [3, 0]], dtype=np.int32)
+    ddd.draw_solid(canvas, obj)
+    drawn = (fb.pixels != 255).any(axis=2)
+    # Строка y экрана видит пол на W = d * 50 / (y - 100), ширина пола 400
+    ys, xs = np.mgrid[0:200, 0:200]
+    with np.errstate(divide="ignore"):
+        w = 15000 / (ys - 100.0)
+    expected = (ys > 100) & (w >= ddd.NEAR) & (w <= 800) & (np.abs(xs - 100) <= 60000 / w)
+    assert (drawn == expected).all()
+
+
+def test_clip_triangles_keeps_winding_in_front_of_near_plane():
+    rng = np.random.default_rng(1)
+    corners = rng.uniform(-5, 5, (200, 3, 3))
+    triangles, source = ddd.clip_triangles(corners)
+    assert (triangles[:, :, 2] >= ddd.NEAR - 1e-9).all()
+    # Нормаль части совпадает по направлению с нормалью исходного треугольника
+    def normal(t):
+        return np.cross(t[:, 1] - t[:, 0], t[:, 2] - t[:, 0])
+    area = np.einsum("ij,ij->i", normal(triangles), normal(corners[source]))
+    assert (area >= -1e-9).all()
+    assert set(source) == set(np.nonzero((corners[:, :, 2] >= ddd.NEAR).any(axis=1))[0])
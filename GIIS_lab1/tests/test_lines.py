@@ -0,0 +1,122 @@
+import random
+
+import numpy as np
+import pytest
+
+import Module.bresenham as bresenham
+import Module.clip as clip
+import Module.dda as dda
+import Module.framebuffer as framebuffer
+import Module.wu as wu
+
+
+def random_viewport(rnd):
+    x0, y0 = rnd.randint(-20, 60), rnd.randint(-20, 60)
+    return x0, y0, x0 + rnd.randint(1, 60), y0 + rnd.randint(1, 60)
+
+
+@pytest.mark.parametrize("algorithm, coordinate", [(dda, random.Random.uniform), (dda, random.Random.randint),
+                                                   (bresenham, random.Random.randint)])
+def test_batch_matches_scalar(algorithm, coordinate):
+    # Пакет выдаёт те же пиксели в том же порядке, что и пошаговый цикл, с окном и без
+    rnd = random.Random(3)
+    for _ in range(200):
+        segments = [[coordinate(rnd, -80, 130) for _ in range(4)] for _ in range(5)]
+        for viewport in (None, random_viewport(rnd)):
+            points, offsets = algorithm.line_points_batch(segments, viewport)
+            for i, segment in enumerate(segments):
+                expected = [list(p) for p in algorithm.line_points(*segment, viewport)]
+                assert points[offsets[i]:offsets[i + 1]].tolist() == expected, (segment, viewport)
+
+
+def test_dda_clipping_matches_unclipped():
+    rnd = random.Random(2)
+    for _ in range(1000):
+        segment = [rnd.uniform(-80, 130) for _ in range(4)]
+        viewport = random_viewport(rnd)
+        expected = [p for p in dda.line_points(*segment) if clip.inside(*p, viewport)]
+        assert list(dda.line_points(*segment, viewport)) == expected, (segment, viewport)
+
+
+def test_dda_clipped_long_segment_is_cheap():
+    # Шаги до окна не перебираются: сотни миллионов шагов отрезка стоят как видимая часть
+    segment = (-10 ** 8, -3 * 10 ** 7, 10 ** 8, 3 * 10 ** 7)
+    points = list(dda.line_points(*segment, (0, 0, 500, 500)))
+    assert len(points) == 500
+    batch, offsets = dda.line_points_batch([segment] * 10, (0, 0, 500, 500))
+    assert offsets.tolist() == list(range(0, 5001, 500))
+    assert np.array_equal(batch[:500], points)
+
+
+def test_spans_cover_bresenham_pixels():
+    rnd = random.Random(4)
+    for _ in range(500):
+        segment = [rnd.randint(-80, 130) for _ in range(4)]
+        for viewport in (None, random_viewport(rnd)):
+            pixels = []
+            for x, y, length, axis in bresenham.line_spans(*segment, viewport):
+                pixels += [(x + k, y) if axis == "x" else (x, y + k) for k in range(length)]
+            assert sorted(pixels) == sorted(bresenham.line_points(*segment, viewport)), (segment, viewport)
+
+
+def test_wu_batch_matches_scalar():
+    rnd = random.Random(5)
+    for _ in range(200):
+        segments = [[rnd.uniform(-80, 130) for _ in range(4)] for _ in range(5)]
+        for viewport in (None, random_viewport(rnd)):
+            points, alpha, offsets = wu.line_coverage_batch(segments, viewport)
+            for i, segment in enumerate(segments):
+                batch = sorted(zip(map(tuple, points[offsets[i]:offsets[i + 1]].tolist()),
+                                   alpha[offsets[i]:offsets[i + 1]].tolist()))
+                expected = sorted(((x, y), a) for x, y, a in wu.line_coverage(*segment, viewport))
+                assert batch == expected, (segment, viewport)
+
+
+def test_blend_points_matches_sequential_blend():
+    # Смешивание через пропускание равно наложению фрагментов по одному с точностью
+    # до округления, которое blend делает на каждом шаге
+    rnd = random.Random(6)
+    for _ in range(300):
+        alpha = [rnd.randint(0, 255) for _ in range(rnd.randint(1, 5))]
+        color = tuple(rnd.randint(0, 255) for _ in range(3))
+        background = rnd.randint(0, 255)
+        batch, single = (framebuffer.get_framebuffer(framebuffer.NullCanvas(4, 4)) for _ in range(2))
+        batch.pixels[:] = background
+        single.pixels[:] = background
+        batch.blend_points(np.array([[1, 2]] * len(alpha)), alpha, color)
+        for a in alpha:
+            single.blend(1, 2, a, color)
+        assert np.abs(batch.pixels.astype(int) - single.pixels).max() <= 1
+
+
+def random_paths(rnd):
+    paths = [[(rnd.randint(-50, 150), rnd.randint(-50, 150)) for _ in range(rnd.randint(1, 6))] for _ in range(3)]
+    offsets = np.cumsum([0] + [len(path) for path in paths])
+    return paths, np.array(sum(paths, []), dtype=np.float64), offsets
+
+
+def test_polyline_joints_drawn_once():
+    rnd = random.Random(7)
+    for _ in range(300):
+        paths, vertices, offsets = random_paths(rnd)
+        for viewport in (None, random_viewport(rnd)):
+            points, point_offsets = bresenham.polyline_points_batch(vertices, offsets, viewport)
+            for i, path in enumerate(paths):
+                expected = [list(p) for p in bresenham.polyline_points(path, viewport)]
+                assert points[point_offsets[i]:point_offsets[i + 1]].tolist() == expected, (path, viewport)
+            points, alpha, point_offsets = wu.polyline_coverage_batch(vertices, offsets, viewport)
+            for i in range(len(paths)):
+                pixels = list(map(tuple, points[point_offsets[i]:point_offsets[i + 1]].tolist()))
+                assert len(pixels) == len(set(pixels))
+        # Без окна каждая вершина Брезенхэма, кроме первой, продолжает звено и не повторяется
+        for path in paths:
+            steps = sum(max(abs(b[0] - a[0]), abs(b[1] - a[1])) for a, b in zip(path, path[1:]))
+            assert len(list(bresenham.polyline_points(path))) == steps + 1
+
+
+def test_wu_joint_on_straight_polyline_matches_line():
+    # Излом с нулевым углом не даёт ни двойного покрытия, ни щели в столбце стыка
+    points, alpha = wu.polyline_coverage([(0, 0), (10, 0), (20, 0)])
+    line_points, line_alpha, _ = wu.line_coverage_batch([(0, 0, 20, 0)])
+    assert sorted(zip(map(tuple, points.tolist()), alpha.tolist())) == \
+        sorted(zip(map(tuple, line_points.tolist()), line_alpha.tolist()))
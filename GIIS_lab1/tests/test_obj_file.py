@@ -0,0 +1,70 @@
+import numpy as np
+import pytest
+
+import Module.obj_file as obj_file
+
+
+def write(tmp_path, data):
+    path = tmp_path / "model.obj"
+    path.write_bytes(data)
+    return str(path)
+
+
+def test_trailing_comments(tmp_path):
+    path = write(tmp_path, b"# \xd0\xba\xd1\x83\xd0\xb1\nv 0 0 0 # a\nv 1 0 0\nv 0 1 0#b\nf 1 2 3 # x\nl 1 2#y\n")
+    vertices, edges, faces = obj_file.parse(path)
+    assert vertices.tolist() == [[0, 0, 0], [1, 0, 0], [0, 1, 0]]
+    assert edges.tolist() == [[0, 1], [0, 2], [1, 2]]
+    assert faces.tolist() == [[0, 1, 2]]
+
+
+def test_non_ascii_outside_data(tmp_path):
+    path = write(tmp_path, b"o \xff\xfe\nv 0 0 0\nv 1 0 0\nv 0 1 0\nusemtl \xd0\xb0\nf 1 2 3\n")
+    vertices, edges, faces = obj_file.parse(path)
+    assert len(vertices) == 3 and faces.tolist() == [[0, 1, 2]]
+
+
+def test_mixed_vertex_width(tmp_path):
+    path = write(tmp_path, b"v 0 0 0 1 0 0\nv 1 0 0\nv 0 1 0\nf 1 2 3\n")
+    vertices, edges, faces = obj_file.parse(path)
+    assert np.array_equal(vertices, [[0, 0, 0], [1, 0, 0], [0, 1, 0]])
+
+
+@pytest.mark.parametrize("data, line", [
+    (b"v 0 0 0\nv 1 0 x\n", "v 1 0 x"),
+    (b"v 0 0\n", "v 0 0"),
+    (b"v 0 0 \xd0\xb0\n", "v 0 0 а"),
+    (b"v 0 0 0\nv 1 0 0\nv 0 1 0\nf 1 2 x\n", "f 1 2 x"),
+    (b"v 0 0 0\nv 1 0 0\nl 1 2.5\n", "l 1 2.5"),
+    (b"v 0 0 0\nv 1 0 0\ne 0 a\n", "e 0 a"),
+])
+def test_malformed_lines(tmp_path, data, line):
+    path = write(tmp_path, data)
+    with pytest.raises(ValueError, match=line):
+        obj_file.load(path)
+
+
+def test_rows_of_different_width_with_matching_total(tmp_path):
+    # 4 + 3 + 3 + 6 значений - столько же, сколько у четырёх строк по 4
+    path = write(tmp_path, b"v 0 0 0 1\nv 10 0 0\nv 0 10 0\nv 0 0 10 1 0 0\n")
+    vertices, edges, faces = obj_file.parse(path)
+    assert vertices.tolist() == [[0, 0, 0], [10, 0, 0], [0, 10, 0], [0, 0, 10]]
+    assert len(edges) == 0 and len(faces) == 0
+
+
+@pytest.mark.parametrize("data, message", [
+    (b"v 0 0 0\nv 1 0 0\nv 0 1 0\nf 1 2 3\nf 1 2 4\n", "строка 5: нет вершины 4"),
+    (b"v 0 0 0\nv 1 0 0\nv 0 1 0\nf -1 -2 -4\n", "строка 4: нет вершины -4"),
+    (b"v 0 0 0\nv 1 0 0\nl 1 2 # x\nl 2 7\n", "строка 4: нет вершины 7"),
+    (b"v 0 0 0\nv 1 0 0\ne 0 1\ne 1 2\n", "строка 4: нет вершины 2"),
+    (b"v 0 0 0\nv 1 0 0\nv 0 1 0\nf 1 0 2\n", "f 1 0 2"),
+])
+def test_missing_vertices(tmp_path, data, message):
+    path = write(tmp_path, data)
+    with pytest.raises(ValueError, match=message):
+        obj_file.parse(path)
+
+
+def test_forward_reference(tmp_path):
+    path = write(tmp_path, b"f 1 2 3\nv 0 0 0\nv 1 0 0\nv 0 1 0\n")
+    assert obj_file.parse(path)[2].tolist() == [[0, 1, 2]]
@@ -0,0 +1,14 @@
+import numpy as np
+import pytest
+
+import Module.framebuffer as framebuffer
+import render
+
+
+@pytest.mark.parametrize("tile, workers", [(97, 1), (64, 1), (128, 2)])
+def test_tiles_match_serial(mixed_scene, tile, workers):
+    # Плитки неровного размера режут примитивы в произвольных местах, стыки не должны быть видны
+    serial = render.render_serial(mixed_scene, 400, 300)
+    mixed_scene.redraw()
+    assert np.array_equal(serial, framebuffer.get_framebuffer(mixed_scene.canvas).pixels)
+    assert np.array_equal(render.render(mixed_scene, 400, 300, tile, workers), serial)
@@ -0,0 +1,48 @@
+import numpy as np
+
+import Module.b_spline as b_spline
+import Module.bezier as bezier
+import Module.bresenham as bresenham
+import Module.framebuffer as framebuffer
+import Module.hermit as hermit
+import Module.scene as scene
+import Module.stepper as stepper
+import Module.wu as wu
+
+
+def new_scene(width=300, height=300):
+    canvas = framebuffer.NullCanvas(width, height)
+    return scene.Scene(canvas), framebuffer.get_framebuffer(canvas)
+
+
+def test_moving_spline_keeps_crossing_primitives():
+    # Пиксель (150, 150) принадлежит сплайну, отрезки проходят через него позже
+    sc, fb = new_scene()
+    spline = sc.add("bspline", b_spline, ((50, 250), (100, 50), (200, 250), (250, 50)))
+    assert sc.pick(150, 150, radius=0) is spline
+    sc.add("line", bresenham, (90, 90, 210, 210))
+    sc.add("line", wu, (90, 210, 210, 90))
+    sc.move_spline_point(spline, 1, 20, 20)
+    moved = fb.pixels.copy()
+    sc.redraw()
+    assert (moved[150, 150] == 0).all()
+    assert (moved == fb.pixels).all()
+
+
+def test_debug_curves_match_redraw():
+    # Пошаговая отрисовка и перерисовка должны ставить одни и те же пиксели
+    rng = np.random.default_rng(3)
+    for kind, algorithm in (("bezier", bezier), ("hermite", hermit)):
+        for _ in range(20):
+            sc, fb = new_scene()
+            points = rng.uniform(-50, 350, (4, 2))
+            if kind == "hermite":
+                params = (tuple(points[0]), tuple(points[1]), tuple(points[2] * 2), tuple(points[3] * 2))
+            else:
+                params = tuple(map(tuple, points))
+            sc.zoom(rng.uniform(0.5, 3), 150, 150)
+            sc.add(kind, algorithm, params, debug=True)
+            stepper.get_scheduler(sc.canvas).finish()
+            stepped = fb.pixels.copy()
+            sc.redraw()
+            assert (stepped == fb.pixels).all(), (kind, params)
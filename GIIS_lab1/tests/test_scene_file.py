@@ -0,0 +1,31 @@
+import numpy as np
+import pytest
+
+import Module.framebuffer as framebuffer
+import Module.scene as scene
+import Module.scene_file as scene_file
+
+
+def test_save_and_load(tmp_path, monkeypatch, mixed_scene):
+    # Маленькие куски, чтобы файл читался в несколько заходов
+    monkeypatch.setattr(scene_file, "CHUNK", 64)
+    path = tmp_path / "mixed.scene"
+    scene_file.save(mixed_scene, path)
+    canvas = framebuffer.NullCanvas(400, 300)
+    loaded = scene.Scene(canvas)
+    scene_file.load(loaded, path)
+    assert (loaded.scale, loaded.origin_x, loaded.origin_y) == (mixed_scene.scale, mixed_scene.origin_x,
+                                                                mixed_scene.origin_y)
+    assert [(p["kind"], p["algorithm"], p["params"]) for p in loaded.primitives] == \
+        [(p["kind"], p["algorithm"], p["params"]) for p in mixed_scene.primitives]
+    mixed_scene.redraw()
+    pixels = framebuffer.get_framebuffer(mixed_scene.canvas).pixels
+    assert (pixels != 255).any()
+    assert np.array_equal(framebuffer.get_framebuffer(canvas).pixels, pixels)
+
+
+def test_load_rejects_foreign_file(tmp_path):
+    path = tmp_path / "mixed.scene"
+    path.write_bytes(b"not a scene\n")
+    with pytest.raises(ValueError):
+        scene_file.read(path)
@@ -0,0 +1,50 @@
+import Module.framebuffer as framebuffer
+import Module.stepper as stepper
+
+
+class TimerCanvas(framebuffer.NullCanvas):
+    # Таймеры canvas.after копятся и запускаются вручную
+    def __init__(self, width, height):
+        super().__init__(width, height)
+        self.timers = {}
+        self.next_job = 0
+
+    def after(self, delay, callback):
+        self.next_job += 1
+        self.timers[self.next_job] = callback
+        return self.next_job
+
+    def after_cancel(self, job):
+        self.timers.pop(job, None)
+
+    def run_timers(self):
+        while self.timers:
+            self.timers.pop(min(self.timers))()
+
+
+def dark(canvas):
+    return int((framebuffer.get_framebuffer(canvas).pixels != 255).any(axis=2).sum())
+
+
+def test_step_on_empty_queue_does_not_pause():
+    canvas = TimerCanvas(50, 50)
+    scheduler = stepper.get_scheduler(canvas)
+    scheduler.step()
+    assert not scheduler.paused
+    stepper.animate(canvas, [(1, 1), (2, 2)])
+    canvas.run_timers()
+    assert dark(canvas) == 2
+
+
+def test_stepping_past_the_end_resumes():
+    canvas = TimerCanvas(50, 50)
+    scheduler = stepper.get_scheduler(canvas)
+    stepper.animate(canvas, [(1, 1), (2, 2)])
+    scheduler.step()
+    scheduler.step()
+    assert scheduler.paused and dark(canvas) == 2
+    scheduler.step()
+    assert not scheduler.paused
+    stepper.animate(canvas, [(3, 3)])
+    canvas.run_timers()
+    assert dark(canvas) == 3
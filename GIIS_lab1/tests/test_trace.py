@@ -0,0 +1,27 @@
+import numpy as np
+import pytest
+
+import Module.dda as dda
+import Module.trace as trace
+import Module.wu as wu
+
+
+@pytest.mark.parametrize("suffix", [".bin", ".csv"])
+@pytest.mark.parametrize("algorithm", [dda.line_points, wu.line_coverage])
+def test_save_and_load(tmp_path, suffix, algorithm):
+    # Вещественная трасса ЦДА и целая трасса Ву переживают запись без изменений
+    recorded = trace.Trace()
+    list(algorithm(0.5, 1.25, 17.3, 9.6, trace=recorded))
+    path = tmp_path / ("trace" + suffix)
+    recorded.save(path)
+    loaded = trace.load(path)
+    assert loaded.fields == recorded.fields
+    assert np.array_equal(loaded.to_array(), recorded.to_array())
+    assert list(loaded.steps()) == list(recorded.steps())
+
+
+def test_load_rejects_foreign_file(tmp_path):
+    path = tmp_path / "trace.bin"
+    path.write_bytes(b"not a trace\n")
+    with pytest.raises(ValueError):
+        trace.load(path)